@@ -0,0 +1,63 @@
+"""
+Benchmark Schema.validate_many() against validating in a Python loop.
+
+Run with:
+
+    python -m benchmarks.batch
+"""
+
+import sys
+import time
+
+from val import Optional, Or, Schema
+
+SIZES = (1000, 100000, 1000000)
+
+SCHEMA = Schema({
+    'id': int,
+    'kind': Or('click', 'view'),
+    Optional('tags'): [str]})
+
+
+def records(size):
+    """Generate a batch of valid records."""
+    return [
+        {'id': i, 'kind': 'click' if i % 2 else 'view', 'tags': ['a']}
+        for i in range(size)]
+
+
+def naive(batch):
+    """Validate records one by one."""
+    return [SCHEMA.validate(record) for record in batch]
+
+
+def batched(batch):
+    """Validate records with validate_many."""
+    return SCHEMA.validate_many(batch)[0]
+
+
+def measure(function, batch):
+    """Return the best of three run times."""
+    best = None
+    for _ in range(3):
+        start = time.time()
+        function(batch)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    """Print run times for both approaches at all batch sizes."""
+    print('%10s %12s %12s %8s' % (
+        'records', 'loop (s)', 'many (s)', 'speedup'))
+    for size in SIZES:
+        batch = records(size)
+        loop = measure(naive, batch)
+        many = measure(batched, batch)
+        print('%10d %12.4f %12.4f %7.2fx' % (size, loop, many, loop / many))
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
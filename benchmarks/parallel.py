@@ -0,0 +1,54 @@
+"""
+Benchmark validate_many() in worker processes.
+
+Scaling depends on the number of cores of the machine, which is printed
+along with the results.
+
+Run with:
+
+    python -m benchmarks.parallel
+"""
+
+import multiprocessing
+import sys
+import time
+
+from val import Optional, Or, Schema
+
+WORKERS = (None, 1, 2, 4, 8)
+SIZE = 200000
+
+SCHEMA = Schema({
+    'id': int,
+    'kind': Or('click', 'view', 'purchase'),
+    'user': {'name': str, Optional('email'): str},
+    Optional('tags'): [str],
+    str: Or(int, float, str, None)})
+
+
+def records(size):
+    """Generate a batch of valid records."""
+    return [
+        {'id': i, 'kind': 'view', 'user': {'name': 'x', 'email': 'y'},
+         'tags': ['a', 'b', 'c'], 'price': 1.5, 'note': None}
+        for i in range(size)]
+
+
+def main():
+    """Print run times for a range of worker processes."""
+    batch = records(SIZE)
+    print('%d records, %d cores' % (SIZE, multiprocessing.cpu_count()))
+    print('%10s %10s %8s' % ('workers', 'time (s)', 'speedup'))
+    baseline = None
+    for workers in WORKERS:
+        start = time.time()
+        SCHEMA.validate_many(batch, workers=workers)
+        elapsed = time.time() - start
+        baseline = baseline or elapsed
+        print('%10s %10.3f %7.2fx' % (
+            workers or '-', elapsed, baseline / elapsed))
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
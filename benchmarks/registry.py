@@ -0,0 +1,80 @@
+"""
+Benchmark building a registry of schemas that reuse the same sub-definitions.
+
+Compares construction time and memory with and without sharing validators
+between structurally equal definitions.
+
+Run with:
+
+    python -m benchmarks.registry
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+from val import _val
+from val import Optional, Schema
+
+SIZE = 5000
+
+
+def address():
+    """A fresh copy of an address definition."""
+    return {
+        'street': str, 'city': str, 'country': str, Optional('zip'): str,
+        Optional('lines'): [str]}
+
+
+def money():
+    """A fresh copy of a money definition."""
+    return {'amount': int, 'currency': str, Optional('scale'): int}
+
+
+def user():
+    """A fresh copy of a user definition."""
+    return {
+        'id': int, 'name': str, Optional('email'): str, 'address': address(),
+        Optional('roles'): [str]}
+
+
+def definition(index):
+    """A definition for the registry, built from fresh sub-definitions."""
+    return {
+        'kind': 'event%d' % (index % 50,), 'owner': user(), 'price': money(),
+        Optional('billing'): address(), Optional('lines'): [money()],
+        Optional('payer'): user()}
+
+
+def build():
+    """Build the registry, returning the schemas, seconds and bytes used."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.time()
+    registry = [Schema(definition(i)) for i in range(SIZE)]
+    elapsed = time.time() - start
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return registry, elapsed, used
+
+
+def main():
+    """Print construction time and memory with and without sharing."""
+    intern_key = _val._intern_key
+    _val._intern_key = lambda schema: None
+    try:
+        _, before, before_memory = build()
+    finally:
+        _val._intern_key = intern_key
+    _, after, after_memory = build()
+    print('%-10s %12s %12s' % ('', 'seconds', 'MiB'))
+    for name, elapsed, used in (
+            ('separate', before, before_memory),
+            ('shared', after, after_memory)):
+        print('%-10s %12.3f %12.1f' % (name, elapsed, used / 2.0 ** 20))
+    sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark start up: importing val and val.tp, and the time it takes a fresh
+process to define many module level schemas and validate with one of them,
+with and without `lazy=True`.
+
+Import times are measured with `python -X importtime`, with bytecode cached
+in a temporary directory. Every measurement runs in a new interpreter.
+
+Run with:
+
+    python -m benchmarks.startup
+
+and pass `--baseline <git revision>` to also time importing the val package
+of that revision, like the first commit, or the main branch.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+SCHEMAS = 500
+REPEAT = 5
+
+FIRST_VALIDATE = '''
+import time
+start = time.time()
+from val import Optional, Or, Schema
+schemas = [
+    Schema({
+        'id': int, 'name': str, Optional('tags'): [str],
+        'kind': Or('a', 'b', i), 'address': {'street': str, 'zip': str}},
+        lazy=%s)
+    for i in range(%d)]
+schemas[0].validate({
+    'id': 1, 'name': 'x', 'kind': 'a',
+    'address': {'street': 'y', 'zip': 'z'}})
+print(time.time() - start)
+'''
+
+
+def run(arguments, path='.', cache=None):
+    """Run a fresh interpreter, and return what it prints to stderr/stdout.
+
+    Bytecode is written to cache, if given.
+
+    """
+    env = dict(os.environ, PYTHONPATH=path)
+    if cache is not None:
+        env.pop('PYTHONDONTWRITEBYTECODE', None)
+        env['PYTHONPYCACHEPREFIX'] = cache
+    process = subprocess.Popen(
+        [sys.executable] + arguments, stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE, env=env)
+    out, err = process.communicate()
+    return out.decode('utf-8'), err.decode('utf-8')
+
+
+def import_time(module, path='.', cache=None):
+    """Return the best cumulative import time of module, in seconds, or None
+    if it can not be imported."""
+    best = None
+    # The first import writes the bytecode.
+    for _ in range(REPEAT + 1):
+        _, err = run(
+            ['-X', 'importtime', '-c', 'import %s' % (module,)], path, cache)
+        for line in err.splitlines():
+            parts = [part.strip() for part in line.split('|')]
+            if len(parts) == 3 and parts[2] == module:
+                elapsed = int(parts[1]) / 1e6
+                best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def export(revision, directory):
+    """Export the val package of a git revision to directory."""
+    archive = subprocess.Popen(
+        ['git', 'archive', revision, 'val'], stdout=subprocess.PIPE)
+    subprocess.check_call(['tar', '-x', '-C', directory], stdin=archive.stdout)
+    if archive.wait():
+        raise SystemExit('can not export %s' % (revision,))
+
+
+def first_validate(lazy):
+    """Return the best time to define the schemas and validate once."""
+    script = FIRST_VALIDATE % (lazy, SCHEMAS)
+    return min(float(run(['-c', script])[0]) for _ in range(REPEAT))
+
+
+def milliseconds(elapsed):
+    """Format a time in seconds, or None, as milliseconds."""
+    return '       -' if elapsed is None else '%8.1f' % (elapsed * 1e3,)
+
+
+def main():
+    """Print import times and times to first validate."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--baseline', help='git revision to compare import times to')
+    options = parser.parse_args()
+    directory = tempfile.mkdtemp()
+    try:
+        if options.baseline:
+            baseline = os.path.join(directory, 'baseline')
+            os.mkdir(baseline)
+            export(options.baseline, baseline)
+        for module in ('val', 'val.tp'):
+            line = 'import %-22s %s ms' % (module, milliseconds(
+                import_time(module, cache=os.path.join(directory, 'head'))))
+            if options.baseline:
+                line += ' (%s ms at %s)' % (milliseconds(import_time(
+                    module, baseline, os.path.join(directory, 'base'))),
+                    options.baseline)
+            print(line)
+            sys.stdout.flush()
+    finally:
+        shutil.rmtree(directory)
+    for lazy in (False, True):
+        print('%d schemas, lazy=%-9s %8.1f ms' % (
+            SCHEMAS, lazy, first_validate(lazy) * 1e3))
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+Benchmark every kind of schema, and the teleport bridge.
+
+Every workload runs on valid and on invalid input, and records operations per
+second and peak memory use of a single operation. Results are compared to a
+stored JSON baseline, and the run fails if any workload is slower, or uses
+more memory, than the baseline allows.
+
+Save a baseline (for instance on the main branch):
+
+    python -m benchmarks.suite --save
+
+and compare a later run against it:
+
+    python -m benchmarks.suite --threshold 0.2
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+from val import And, Convert, NotValid, Optional, Or, Ordered, Schema
+from val import tp
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+REPEAT = 3
+# Growth in peak memory below this many bytes is never a regression.
+MEMORY_SLACK = 1024
+
+EXPECTED_ERRORS = (
+    NotValid, tp.DeserializationError, tp.SerializationError)
+
+
+def positive(value):
+    """Must be positive."""
+    return value > 0
+
+
+def deep(depth):
+    """A definition, valid and invalid data nested depth dictionaries deep."""
+    definition, valid, invalid = {'value': int}, {'value': 1}, {'value': 'x'}
+    for _ in range(depth):
+        definition = {'value': int, 'child': definition}
+        valid = {'value': 1, 'child': valid}
+        invalid = {'value': 1, 'child': invalid}
+    return definition, valid, invalid
+
+
+def wide(size):
+    """A definition, valid and invalid data with size keys."""
+    keys = ['key%d' % (i,) for i in range(size)]
+    valid = dict.fromkeys(keys, 1)
+    invalid = dict(valid, key0='x')
+    return dict.fromkeys(keys, int), valid, invalid
+
+
+def long_list(size):
+    """A definition, valid and invalid lists of size items."""
+    valid = list(range(size))
+    return [int], valid, valid[:-1] + ['x']
+
+
+TODO = {
+    'Struct': {
+        'required': {'task': 'String', 'tags': {'Array': 'String'}},
+        'optional': {'priority': 'Integer', 'deadline': 'DateTime'}}}
+
+TODO_SCHEMA = Schema({
+    'task': str, 'tags': [str], Optional('priority'): int,
+    Optional('deadline'): tp.rfc3339})
+
+
+def workloads():
+    """Return (name, function, valid input, invalid input) for every case."""
+    deep_definition, deep_valid, deep_invalid = deep(20)
+    wide_definition, wide_valid, wide_invalid = wide(1000)
+    list_definition, list_valid, list_invalid = long_list(10000)
+    return [
+        ('type', Schema(int).validate, 1, 'x'),
+        ('static', Schema('foo').validate, 'foo', 'bar'),
+        ('callable', Schema(positive).validate, 1, -1),
+        ('wide dict', Schema(wide_definition).validate, wide_valid,
+         wide_invalid),
+        ('deep dict', Schema(deep_definition).validate, deep_valid,
+         deep_invalid),
+        ('long list', Schema(list_definition).validate, list_valid,
+         list_invalid),
+        ('or', Or(*range(50)).validate, 49, 'x'),
+        ('and', And(int, *[positive] * 10).validate, 5, -5),
+        ('ordered', Ordered((str, int, float, bool)).validate,
+         ('a', 1, 1.0, True), ('a', 'b', 1.0, True)),
+        ('convert', Convert(int).validate, '12', 'x'),
+        ('tp.to_val', tp.to_val, TODO, {'Struct': {}}),
+        ('tp.from_val', tp.from_val, TODO_SCHEMA, Schema({'a': object})),
+        ('tp.document', tp.document, TODO_SCHEMA, Schema({'a': object})),
+    ]
+
+
+def operation(function, data):
+    """Return a function that calls function(data), expecting errors."""
+
+    def run():
+        try:
+            function(data)
+        except EXPECTED_ERRORS:
+            pass
+
+    return run
+
+
+def ops_per_second(run):
+    """Return the best number of calls per second of run."""
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    return number / min(timer.repeat(repeat=REPEAT, number=number))
+
+
+def peak_memory(run):
+    """Return the peak memory allocated during a single call of run."""
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(only=None):
+    """Measure all workloads whose name contains only, if given."""
+    for name, function, valid, invalid in workloads():
+        if only and only not in name:
+            continue
+        for kind, data in (('valid', valid), ('invalid', invalid)):
+            run = operation(function, data)
+            yield '%s/%s' % (name, kind), {
+                'ops': ops_per_second(run), 'peak': peak_memory(run)}
+
+
+def compare(result, baseline, threshold):
+    """Return a description of how result changed, and if it regressed."""
+    if baseline is None:
+        return '', False
+
+    speed = result['ops'] / baseline['ops'] - 1
+    memory = result['peak'] / float(max(baseline['peak'], 1)) - 1
+    regressed = speed < -threshold or (
+        memory > threshold and
+        result['peak'] - baseline['peak'] > MEMORY_SLACK)
+    return '%+7.1f%% %+7.1f%%%s' % (
+        speed * 100, memory * 100, '  REGRESSION' if regressed else ''), (
+        regressed)
+
+
+def main(arguments=None):
+    """Run the suite, print results and return the exit status."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument(
+        '--baseline', default=BASELINE, help='JSON baseline to compare to')
+    parser.add_argument(
+        '--threshold', type=float, default=0.2,
+        help='allowed fraction of slowdown or extra memory (default 0.2)')
+    parser.add_argument(
+        '--save', action='store_true', help='store results as the baseline')
+    parser.add_argument(
+        '--only', help='only run workloads whose name contains this')
+    options = parser.parse_args(arguments)
+    baseline = {}
+    if not options.save and os.path.exists(options.baseline):
+        with open(options.baseline) as stored:
+            baseline = json.load(stored)
+    print('%-24s %14s %12s %17s' % (
+        'workload', 'ops/sec', 'peak KiB', 'speed  memory'))
+    regressions = 0
+    results = {}
+    for name, result in measure(options.only):
+        results[name] = result
+        change, regressed = compare(
+            result, baseline.get(name), options.threshold)
+        regressions += regressed
+        print('%-24s %14.1f %12.1f %s' % (
+            name, result['ops'], result['peak'] / 1024.0, change))
+        sys.stdout.flush()
+    if options.save:
+        with open(options.baseline, 'w') as stored:
+            json.dump(results, stored, indent=2, sort_keys=True)
+        print('Saved baseline to %s' % (options.baseline,))
+    if regressions:
+        print('%d regression(s) beyond %.0f%%' % (
+            regressions, options.threshold * 100))
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
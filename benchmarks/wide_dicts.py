@@ -0,0 +1,59 @@
+"""
+Benchmark dictionary validation for wide dictionaries.
+
+Validation time per key should stay flat from 10 to 100k keys, for every kind
+of key: mandatory, optional and typed.
+
+Run with:
+
+    python -m benchmarks.wide_dicts
+"""
+
+import sys
+import timeit
+
+from val import Optional, Schema
+
+SIZES = (10, 100, 1000, 10000, 100000)
+
+
+def mandatory(size):
+    """Schema and data with only mandatory keys."""
+    keys = ['key%d' % (i,) for i in range(size)]
+    return Schema(dict((key, int) for key in keys)), dict.fromkeys(keys, 1)
+
+
+def optional(size):
+    """Schema and data with only optional keys, half of them missing."""
+    keys = ['key%d' % (i,) for i in range(size)]
+    return (
+        Schema(dict((Optional(key), Schema(int, default=0)) for key in keys)),
+        dict.fromkeys(keys[::2], 1))
+
+
+def typed(size):
+    """Schema with a single type key, and data with many keys."""
+    keys = ['key%d' % (i,) for i in range(size)]
+    return Schema({str: int}), dict.fromkeys(keys, 1)
+
+
+def measure(build, size):
+    """Return the best time per key for validating data of a given size."""
+    schema, data = build(size)
+    number = max(1, 100000 // size)
+    timer = timeit.Timer(lambda: schema.validate(data))
+    return min(timer.repeat(repeat=3, number=number)) / number / size
+
+
+def main():
+    """Print the time per key for all kinds of keys and sizes."""
+    print('%-10s %8s %14s' % ('keys', 'size', 'ns per key'))
+    for build in (mandatory, optional, typed):
+        for size in SIZES:
+            print('%-10s %8d %14.1f' % (
+                build.__name__, size, measure(build, size) * 1e9))
+            sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,9 @@
+"""Test configuration."""
+
+import sys
+
+# Asynchronous validation needs `async def`, which older Pythons can not
+# parse.
+collect_ignore = []
+if sys.version_info < (3, 7):
+    collect_ignore.append('test_async.py')
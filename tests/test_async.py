@@ -0,0 +1,166 @@
+"""Tests for asynchronous validation."""
+
+import asyncio
+import pytest
+from val import (
+    And, BaseSchema, Convert, NotValid, Optional, Or, Ordered, Schema)
+
+
+class FakeUserService(object):
+
+    """In-process stand-in for a remote user lookup service."""
+
+    def __init__(self, users):
+        self.users = set(users)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lookups = 0
+
+    async def _lookup(self, user_id):
+        self.lookups += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+            return user_id in self.users
+        finally:
+            self.in_flight -= 1
+
+    async def exists(self, user_id):
+        """User exists."""
+        return await self._lookup(user_id)
+
+    async def load(self, user_id):
+        if not await self._lookup(user_id):
+            raise ValueError('no user %r' % (user_id,))
+
+        return {'id': user_id}
+
+
+def run(awaitable):
+    return asyncio.run(awaitable)
+
+
+def test_async_callable():
+    service = FakeUserService([1, 2])
+    schema = Schema(And(int, service.exists))
+    assert run(schema.validate_async(1)) == 1
+    with pytest.raises(NotValid) as ctx:
+        run(schema.validate_async(3))
+    assert ctx.value.args == ("3 invalidated by 'User exists.'",)
+
+
+def test_async_dict_values_are_validated_concurrently():
+    service = FakeUserService(range(10))
+    schema = Schema({
+        'owner': service.exists,
+        Optional('reviewer'): service.exists,
+        str: service.exists})
+    data = dict(('user%d' % (i,), i) for i in range(8))
+    data.update({'owner': 8, 'reviewer': 9})
+    assert run(schema.validate_async(data)) == data
+    assert service.lookups == 10
+    assert service.max_in_flight == 10
+
+
+def test_async_dict_errors_match_sync_errors():
+    service = FakeUserService([1])
+    schema = Schema({
+        'owner': service.exists, 'kind': str, Optional('reviewer'): int,
+        str: Or(int, service.exists)})
+    data = {'owner': 2, 'reviewer': 'x', 'other': 'y', 'third': 1}
+    with pytest.raises(NotValid) as ctx:
+        run(schema.validate_async(data))
+    assert ctx.value.args == (
+        "'owner': 2 invalidated by 'User exists.'",
+        "missing key: 'kind'",
+        "'reviewer': 'x' is not of type %r" % (int,),
+        "'other': 'y' not matched")
+
+
+def test_async_list_items_and_limit():
+    service = FakeUserService(range(20))
+    schema = Schema([service.exists])
+    assert run(schema.validate_async(list(range(20)), concurrency=3)) == (
+        list(range(20)))
+    assert service.max_in_flight == 3
+    with pytest.raises(NotValid):
+        run(schema.validate_async([1, 25, 2]))
+
+
+def test_async_convert_or_and_ordered():
+    service = FakeUserService([1, 2])
+    schema = Ordered([Or(None, Convert(service.load)), And(int, lambda n: n)])
+    assert run(schema.validate_async([1, 3])) == [{'id': 1}, 3]
+    assert run(schema.validate_async((None, 3))) == [None, 3]
+    with pytest.raises(NotValid):
+        run(schema.validate_async([3, 3]))
+    with pytest.raises(NotValid):
+        run(schema.validate_async([1]))
+
+
+def test_async_additional_validators():
+    service = FakeUserService([1])
+
+    async def owner_exists(value):
+        """Owner exists."""
+        return await service.exists(value['owner'])
+
+    schema = Schema({'owner': int}, additional_validators=(owner_exists,))
+    assert run(schema.validate_async({'owner': 1})) == {'owner': 1}
+    with pytest.raises(NotValid) as ctx:
+        run(schema.validate_async({'owner': 2}))
+    assert ctx.value.args == ("{'owner': 2} invalidated by 'Owner exists.'",)
+    schema = Schema(Or(None, service.exists), default=1)
+    assert run(schema.validate_async(None)) == 1
+
+
+def test_async_validation_of_sync_schemas():
+    schema = Schema({'a': [int], Optional('b'): Schema(str, default='x')})
+    assert run(schema.validate_async({'a': [1]})) == {'a': [1], 'b': 'x'}
+    with pytest.raises(NotValid) as ctx:
+        run(schema.validate_async({'a': ['1']}))
+    with pytest.raises(NotValid) as sync:
+        schema.validate({'a': ['1']})
+    assert ctx.value.args == sync.value.args
+
+
+def test_async_subclasses_that_only_override_validate():
+
+    class Even(BaseSchema):
+
+        def validate(self, data):
+            if data % 2:
+                raise NotValid('%r is odd' % (data,))
+            return data
+
+    assert run(Schema([Even()]).validate_async([2, 4])) == [2, 4]
+    with pytest.raises(NotValid):
+        run(Schema([Even()]).validate_async([3]))
+
+
+def test_async_exceptions_are_valid_data():
+    boom = ValueError('boom')
+    schemas = [
+        Schema({'e': Exception, 'f': lambda x: True}),
+        Schema([Exception, lambda x: True]),
+        Ordered([Exception, lambda x: True])]
+    data = [{'e': boom, 'f': 1}, [boom, 1], [boom, 1]]
+    for schema, value in zip(schemas, data):
+        assert run(schema.validate_async(value)) == schema.validate(value)
+
+
+def test_async_tagged_or_errors_match_sync_errors():
+    schema = Schema(Or(
+        {'type': 'click', 'x': int, 'check': lambda x: True},
+        {'type': 'key', 'code': str}))
+    for data in [
+            {'type': 'click', 'x': 'a', 'check': 1}, {'type': 'key'},
+            {'type': 'scroll'}, {'x': 1}]:
+        with pytest.raises(NotValid) as ctx:
+            run(schema.validate_async(data))
+        with pytest.raises(NotValid) as sync:
+            schema.validate(data)
+        assert ctx.value.args == sync.value.args
+    assert run(schema.validate_async({'type': 'key', 'code': 'a'})) == {
+        'type': 'key', 'code': 'a'}
@@ -0,0 +1,123 @@
+"""Tests that compiled schemas agree with the closure engine."""
+
+import array
+import pytest
+from decimal import Decimal
+from val import (
+    nullable, And, Convert, NotValid, Optional, Or, Ordered, Schema)
+
+
+def less_than_two(value):
+    """Must be less than two."""
+    return value < 2
+
+
+def is_positive(value):
+    return value > 0
+
+
+CASES = [
+    ('test', ['test', 'bar', 1, None]),
+    (12, [12, 12.0, True, '12']),
+    (str, ['', 'foo', 1, None, b'x']),
+    (int, [1, True, 1.5, '1']),
+    (object, [None, 1, {}, []]),
+    (less_than_two, [1, 12, 'foo', None]),
+    (is_positive, [1, -1, 'a']),
+    (lambda x: x + 2, [1, 'foo']),
+    ([str], [['1', '2'], ['1', 2], [], '1', ('1',)]),
+    ([str, int], [['1', 2, '3'], ['1', 2.0], set()]),
+    (['foo', 'bar', 13], [['foo', 13], ['baz']]),
+    ((int,), [(1, 2), [1, 2], (1, '2')]),
+    (set([int]), [set([1, 2]), [1, 2], set(['1'])]),
+    ([[int], {'a': int}], [[[1], {'a': 1}], [[1.0]], [{'a': 'x'}]]),
+    ({'key': str}, [
+        {'key': 'val'}, {'key': 1}, {}, 'foo', {'key': 'a', 1: 2}]),
+    ({'a': 1, Optional('b'): 2}, [{'a': 1}, {'a': 1, 'b': 2}, {'b': 3}]),
+    ({Optional('a'): 1}, [{'a': 2}, {}, {'b': 1}]),
+    ({str: int}, [{'a': 1, 'b': 2}, {1: 1, 'b': 2}, {'a': 'b'}]),
+    ({'key': 42, object: 42}, [{'key': 42, 777: 42}, {'key': 1, 2: 3}]),
+    ({'foo': int, str: object}, [{'foo': 1, 'x': []}, {'foo': 'bar'}]),
+    ({'foo': int, str: int, int: str}, [
+        {'foo': 1, 'bar': 2, 3: '4'}, {'foo': 1, 'bar': '2', 3: 4}]),
+    ({str: is_positive, object: str}, [
+        {'a': 1, 'b': 'x', 2: 'y'}, {'a': 'x', 2: 3}]),
+    ({'key': str, Optional('key2'): Schema(str, default='val2')}, [
+        {'key': 'val'}, {'key': 'val', 'key2': 'other'},
+        {'key': 'val', 'key2': None}, {'key': 'val', 'key2': 1}]),
+    ({Optional('key'): Schema(str, default='x', null_values=('',))}, [
+        {}, {'key': ''}, {'key': 'y'}]),
+    ({'key': int, Optional('key'): Schema(int, default=3)}, [{'key': 1}]),
+    ({'foo': {'bar': [int], Optional('baz'): {str: str}}}, [
+        {'foo': {'bar': [1]}},
+        {'foo': {'bar': [1], 'baz': {'a': 'b'}}},
+        {'foo': {'bar': ['1'], 'baz': {'a': 1}}},
+        {'foo': []}]),
+    ({'ID': Convert(int), 'FILE': Or(None, Convert(open))}, [
+        {'ID': '10', 'FILE': None}, {'ID': 'x', 'FILE': None}]),
+    ({'name': nullable(str)}, [{'name': None}, {'name': 'x'}, {'name': 1}]),
+    ({'values': And([int], lambda v: len(v) > 2)}, [
+        {'values': [1, 2, 3]}, {'values': [1]}, {'values': ['a']}]),
+    ([Ordered([str, int])], [[['a', 1]], [['a', 'b']], [['a']]]),
+    (Or(1, str, Convert(int)), [1, 'foo', 1.5, None]),
+    (['a', 'b', 1, 2.0, int, 'c', None, False], [
+        ['a', 1.0, True, None, 3, 'c', 0], ['d'], [2.5], [Decimal(2)],
+        [float('nan')]]),
+    ([int], [array.array('i', [1, 2]), array.array('d', [1.0]), [1, 2]]),
+    ([And(int, is_positive)], [
+        array.array('b', [1, 2]), array.array('b', [1, 0])]),
+]
+
+
+def _outcome(schema, data):
+    try:
+        result = schema.validate(data)
+    except NotValid as ex:
+        return ('error', ex.args)
+
+    return ('ok', type(result), result)
+
+
+@pytest.mark.parametrize('definition, inputs', CASES)
+def test_compiled_agrees_with_closures(definition, inputs):
+    closures = Schema(definition)
+    compiled = Schema(definition, compile=True)
+    for data in inputs:
+        assert _outcome(compiled, data) == _outcome(closures, data)
+
+
+def test_compiled_schema_exposes_source():
+    schema = Schema({'key': [int]}, compile=True)
+    assert 'def dict_validator' in schema.schema.source
+    assert 'isinstance(value, type_' in schema.schema.source
+
+
+def test_compiled_schema_keeps_schema_options():
+    schema = Schema(
+        {'foo': int, 'bar': int},
+        compile=True,
+        additional_validators=(lambda value: value['foo'] > 1,))
+    assert schema.validates({'foo': 2, 'bar': 3})
+    assert not schema.validates({'foo': 1, 'bar': 3})
+    schema = Schema(Or(None, int), compile=True, default=12)
+    assert schema.validate(None) == 12
+
+
+def test_compiled_schema_returns_new_containers():
+    data = {'key': [1, 2]}
+    validated = Schema({'key': [int]}, compile=True).validate(data)
+    assert validated == data
+    assert validated is not data
+    assert validated['key'] is not data['key']
+
+
+@pytest.mark.parametrize('max_errors', [1, 2, 3])
+def test_compiled_agrees_on_max_errors(max_errors):
+    definition = {
+        'a': int, 'b': {'c': int, 'd': int}, Optional('e'): [str],
+        str: int}
+    closures = Schema(definition, max_errors=max_errors)
+    compiled = Schema(definition, compile=True, max_errors=max_errors)
+    for data in [{}, {'b': {}}, {'a': 'x', 'b': {}, 'e': [1], 'f': 'g'},
+                 {'a': 1, 'b': {'c': 1, 'd': 2}, 'x': 'y', 'z': 'w'}]:
+        assert _outcome(compiled, data) == _outcome(closures, data)
@@ -0,0 +1,137 @@
+"""Tests for constraint schemas."""
+
+import array
+import pickle
+import re
+
+import pytest
+from val import (
+    And, Length, NotValid, OneOf, Optional, Or, Pattern, Range, Schema)
+
+
+def _error(schema, data):
+    with pytest.raises(NotValid) as ctx:
+        schema.validate(data)
+    return ctx.value.args
+
+
+def test_range():
+    schema = Range(0, 10)
+    assert (schema.minimum, schema.maximum) == (0, 10)
+    assert schema.validate(0) == 0
+    assert schema.validate(10.0) == 10.0
+    assert Range(minimum=5).validate(10 ** 10) == 10 ** 10
+    assert Range(maximum='b').validate('a') == 'a'
+    assert _error(schema, -1) == ('-1 is less than 0',)
+    assert _error(schema, 11) == ('11 is greater than 10',)
+    assert _error(schema, 'x') == ("'x' can not be compared to 0",)
+    assert not schema.validates(float('nan'))
+    assert repr(schema) == '<Range: 0 to 10>'
+
+
+def test_length():
+    schema = Length(1, 3)
+    assert (schema.minimum, schema.maximum) == (1, 3)
+    assert schema.validate('abc') == 'abc'
+    assert schema.validate([1]) == [1]
+    assert _error(schema, '') == ("'' is shorter than 1",)
+    assert _error(schema, (1, 2, 3, 4)) == ('(1, 2, 3, 4) is longer than 3',)
+    assert _error(schema, 1) == ('1 has no length',)
+    assert Length(maximum=0).validates({})
+
+
+def test_pattern():
+    schema = Pattern(r'[a-z]+\d?')
+    assert schema.pattern.pattern == r'[a-z]+\d?'
+    assert schema.validate('abc1') == 'abc1'
+    assert _error(schema, 'abc12') == (
+        r"'abc12' does not match '[a-z]+\\d?'",)
+    assert not schema.validates('1abc')
+    assert not schema.validates(1)
+    assert not schema.validates(b'abc')
+    assert Pattern(re.compile('a|b')).validates('b')
+    assert not Pattern('a|b').validates('ab')
+    assert not Pattern('a').validates('a\n')
+    assert Pattern('A', re.IGNORECASE).validates('a')
+    assert Pattern(b'a+').validates(b'aa')
+    assert Pattern('(?i)abc').validates('ABC')
+    assert not Pattern('(?i)abc').validates('ABCD')
+
+
+def test_one_of():
+    schema = OneOf('a', 1, None)
+    assert schema.values == ('a', 1, None)
+    assert schema.validate('a') == 'a'
+    assert schema.validate(True) is True
+    assert schema.validate(1.0) == 1.0
+    assert schema.validates(None)
+    assert _error(schema, 'b') == ("'b' is not one of ('a', 1, None)",)
+    from decimal import Decimal
+    assert schema.validates(Decimal(1))
+    assert OneOf([1], {'a': 1}).validates([1])
+    assert not OneOf([1]).validates([2])
+
+
+def test_constraints_combine_with_other_schemas():
+    schema = Schema({
+        'name': And(str, Length(1, 20), Pattern(r'\w+')),
+        Optional('age'): And(int, Range(0, 150)),
+        'role': OneOf('admin', 'user')})
+    assert schema.validates({'name': 'joe', 'age': 3, 'role': 'user'})
+    assert _error(schema, {'name': '', 'age': 300, 'role': 'x'}) == (
+        "'name': '' is shorter than 1",
+        "'role': 'x' is not one of ('admin', 'user')",
+        "'age': 300 is greater than 150")
+    either = Or(Range(0, 1), Pattern('[01]'))
+    assert either.validate('1') == '1'
+    assert either.validate(0.5) == 0.5
+
+
+def test_constraints_can_be_cached_and_pickled():
+    schema = Schema(And(int, Range(0, 10)), cache_size=10)
+    schema.validate(5)
+    schema.validate(5)
+    assert schema.cache_info().hits == 1
+    for constraint in [Range(0, 1), Length(2), Pattern('a+'), OneOf(1, 2)]:
+        copy = pickle.loads(pickle.dumps(constraint))
+        assert repr(copy) == repr(constraint)
+
+
+def test_first_invalid_of_many_values():
+    assert Range(0, 10)._first_invalid([1, 2, 30, -1]) == 2
+    assert Range(0, 10)._first_invalid([]) is None
+    assert OneOf(1, 2)._first_invalid((1, 2, 1)) is None
+    assert Length(1)._first_invalid(['a', '', 'b']) == 1
+    values = array.array('d', [0.5, 0.25, float('nan'), 2.0])
+    assert Range(0, 1)._first_invalid(values) == 2
+    assert Range(0, 1)._first_invalid(values[:2]) is None
+    assert OneOf(1, 2)._first_invalid(array.array('b', [1, 2, 3])) == 2
+
+
+def test_constraints_check_whole_buffers():
+    schema = Schema([And(float, Range(0, 1))])
+    values = array.array('d', [0.5] * 1000)
+    assert schema.validate(values) is values
+    values[700] = 1.5
+    assert _error(schema, values) == (
+        '700: 1.5 invalidated by anything in [%r].' % (schema.definition[0],),)
+    calls = []
+
+    def counted(value):
+        calls.append(value)
+        return True
+
+    values = array.array('q', [1, 2, 3, 40, 5])
+    schema = Schema([And(int, counted, Range(0, 10), OneOf(1, 2, 5))])
+    assert _error(schema, values)[0].startswith('2: 3 invalidated')
+    assert calls == [1, 2, 3, 40, 5]
+
+
+def test_constraints_check_numpy_arrays():
+    numpy = pytest.importorskip('numpy')
+    values = numpy.linspace(0, 1, 1000)
+    schema = Schema([And(float, Range(0, 1))])
+    assert schema.validate(values) is values
+    values[300] = numpy.nan
+    assert Range(0, 1)._first_invalid(values) == 300
+    assert _error(schema, values)[0].startswith('300: nan invalidated')
@@ -0,0 +1,106 @@
+"""Tests for the schema optimizer."""
+
+import pickle
+
+import pytest
+from val import (
+    And, Convert, NotValid, Or, Ordered, Range, Schema, nullable, optimize)
+
+
+def positive(value):
+    return value > 0
+
+
+def test_flattens_nested_schemas():
+    small = Range(0, 9)
+    assert optimize(And(And(int, positive), And(small))).definition.values == (
+        int, positive, small)
+    optimized = optimize(Or(int, Or(str, Or(bytes, None))))
+    assert optimized.definition.values == (int, str, bytes, None)
+    assert optimized[1:] == (7, 5)
+    assert optimize(Schema(Schema(int))).definition is int
+    assert optimize(And(int)) == (int, 2, 1)
+
+
+def test_drops_duplicate_and_implied_alternatives():
+    assert optimize(nullable(nullable(str))).definition.values == (None, str)
+    assert optimize(Or(int, bool, 1, 1, 1.0, positive, positive))\
+        .definition.values == (int, 1, 1.0, positive)
+    assert optimize([int, int, {'a': 1}, {'a': 1}]).definition == [
+        int, {'a': 1}]
+    assert optimize(And(bool, int, positive, positive)).definition.values == (
+        bool, positive)
+
+
+def test_keeps_steps_after_conversions():
+    convert = Convert(int)
+    definition = And(positive, int, convert, int, convert)
+    optimized = optimize(definition).definition
+    assert optimized.values == (int, positive, convert, int, convert)
+    assert optimized.validate(3) == 3
+    assert optimize(optimized).definition is optimized
+
+
+def test_moves_types_ahead_of_callables():
+    seen = []
+
+    def counted(value):
+        seen.append(value)
+        return True
+
+    schema = Schema(And(counted, str), optimize=True)
+    assert schema.definition.values == (str, counted)
+    assert not schema.validates(1)
+    assert seen == []
+    convert = Convert(str)
+    assert optimize(Or(counted, convert, int, 1)).definition.values == (
+        counted, convert, int, 1)
+
+
+def test_keeps_options_and_unchanged_definitions():
+    definition = {'a': [int], 'b': Or(int, str, default=0)}
+    assert optimize(definition).definition is definition
+    schemas = [
+        Schema(int, default=1), Schema(int, compile=True),
+        Or(int, additional_validators=[positive]),
+        And(int, max_errors=1), Ordered([int, int])]
+    for schema in schemas:
+        assert schema in optimize(Or(schema, str)).definition.values
+    optimized = optimize(Or(int, int, default=0, null_values=(-1,)))
+    assert optimized.definition.values == (int,)
+    assert optimized.definition.validate(-1) == 0
+    assert optimize(Or(list, list, dict, adaptive=True)).definition.adaptive
+    adaptive = Or(list, dict, adaptive=True)
+    assert optimize(Or(adaptive, int)).definition.values == (int, adaptive)
+    assert optimize(Or(adaptive, int, adaptive=True)).definition.values == (
+        list, dict, int)
+
+
+@pytest.mark.parametrize('data', [
+    {'a': 1, 'b': None}, {'a': True, 'b': 'x'}, {'a': -1, 'b': 'x'},
+    {'a': '1', 'b': 'y'}, {'a': 1.5, 'b': 1}, {'b': None}])
+def test_optimized_schemas_validate_alike(data):
+    definition = {
+        'a': Or(And(And(int, positive), int), Or(bool, And(str, positive))),
+        'b': nullable(nullable(Or('x', Or('x', 'y'))))}
+    schema = Schema(definition)
+    optimized = Schema(definition, optimize=True)
+    assert optimized.optimized.after < optimized.optimized.before
+    try:
+        expected = schema.validate(data)
+    except NotValid:
+        assert not optimized.validates(data)
+        with pytest.raises(NotValid):
+            optimized.validate(data)
+    else:
+        assert optimized.validate(data) == expected
+        assert optimized.validates(data)
+
+
+def test_optimized_schemas_can_be_pickled():
+    schema = Schema(Or(int, Or(int, str)), optimize=True, compile=True)
+    copy = pickle.loads(pickle.dumps(schema))
+    assert copy.optimized == schema.optimized._replace(
+        definition=copy.definition)
+    assert copy.validate('x') == 'x'
+    assert Schema(int).optimized is None
@@ -0,0 +1,144 @@
+"""Tests for profiling validation per schema node."""
+
+import pytest
+from val import (
+    And, Convert, NotValid, Optional, Or, Ordered, Schema, profile)
+
+SCHEMAS = [
+    Schema({
+        'user': {'name': str, 'tags': [str, int]},
+        Optional('size'): Or(int, None, default=0), str: float}),
+    Schema([Ordered([str, And(int, lambda n: n > 0)])]),
+    Schema({'id': Convert(int)}, additional_validators=(
+        lambda value: value['id'] < 10,)),
+]
+
+DATA = [
+    {'user': {'name': 'x', 'tags': ['a', 1]}, 'other': 1.5},
+    {'user': {'name': 'x', 'tags': [None]}, 'size': 'big', 'other': 1},
+    {'user': {'name': 'x', 'tags': []}, 'size': None},
+    [['a', 1], ['b', 2]],
+    [['a', -1], ['b']],
+    {'id': '3'},
+    {'id': '30'},
+    {'id': 'x'},
+    None,
+]
+
+
+def _outcome(schema, data):
+    try:
+        return schema.validate(data)
+    except NotValid as ex:
+        return ex.args
+
+
+@pytest.mark.parametrize('schema', SCHEMAS)
+def test_profiled_validation_agrees(schema):
+    expected = [_outcome(schema, data) for data in DATA]
+    with profile():
+        assert [_outcome(schema, data) for data in DATA] == expected
+
+
+def test_profiled_validation_keeps_schema_options():
+    data = {'a': [1, 2], 'b': 'x'}
+    schemas = [
+        Schema({'a': [int], 'b': str}, copy_on_write=True),
+        Schema({'a': [str], 'b': int}, max_errors=1),
+        Schema({'a': [int], 'b': str}, compile=True),
+        Schema(Or(int, str), cache_size=2)]
+    expected = [_outcome(schema, data) for schema in schemas]
+    schemas[3].validate('x')
+    with profile() as stats:
+        assert schemas[0].validate(data) is data
+        assert [_outcome(schema, data) for schema in schemas] == expected
+        assert schemas[3].validate('x') == 'x'
+    assert schemas[3].cache_info().currsize == 1
+    assert stats.nodes['root#2'].failures == 1
+    assert "root#2['a']" in stats.nodes
+    assert "root#3['a']" not in stats.nodes
+
+
+def test_profile_counts_calls_and_failures_per_path():
+    schema = SCHEMAS[0]
+    with profile() as stats:
+        for data in DATA[:3]:
+            _outcome(schema, data)
+    nodes = stats.nodes
+    assert "root['user']['name']" in nodes
+    assert nodes['root'].kind == 'Schema'
+    assert nodes['root'].calls == 3
+    assert nodes['root'].failures == 1
+    # The items of the tags are only checked with isinstance().
+    assert nodes["root['user']['tags']"].calls == 3
+    assert nodes["root['user']['tags']"].failures == 1
+    assert "root['user']['tags'][*]<0>" not in nodes
+    assert nodes["root['size']"].calls == 2
+    assert nodes["root['size']<1>"].kind == 'literal'
+    assert nodes['root[str]'].calls == 2
+    root = nodes['root']
+    assert root.total >= root.own > 0
+    assert 'root[\'user\'][\'tags\']' in stats.table()
+
+
+def test_profile_exports_collapsed_stacks():
+    with profile() as stats:
+        SCHEMAS[1].validate([['a', 1]])
+        Schema(int).validate(1)
+    lines = stats.collapsed().splitlines()
+    stacks = [line.rsplit(' ', 1)[0] for line in lines]
+    assert 'root;root[*];root[*][1];root[*][1]<0>' in stacks
+    assert 'root#2' in stacks
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+
+def test_profile_is_disabled_after_the_block():
+    validate = Schema.validate
+    with profile() as stats:
+        assert Schema.validate is not validate
+    assert Schema.validate is validate
+    Schema(int).validate(1)
+    assert not stats.nodes
+
+
+def test_profile_memory_per_node():
+    import gc
+    import tracemalloc
+    schema = Schema({'items': [{'id': int}], Optional('name'): str})
+    data = {'items': [{'id': i} for i in range(1000)], 'name': 'x'}
+    # Garbage from earlier tests that is collected while profiling would
+    # count as memory freed by the nodes.
+    gc.collect()
+    with profile(memory=True) as stats:
+        assert tracemalloc.is_tracing()
+        schema.validate(data)
+    assert not tracemalloc.is_tracing()
+    top = stats.top(1)[0]
+    assert top.path == "root['items'][*]"
+    assert top.own_allocated > 1000 * 100
+    assert stats.nodes['root'].peak >= stats.nodes['root'].allocated > (
+        top.own_allocated)
+    assert 'peak (KiB)' in stats.table()
+    assert "root;root['items'];root['items'][*] " in stats.collapsed(
+        memory=True)
+
+
+def test_profile_memory_keeps_tracing_that_was_already_on():
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        with profile(memory=True):
+            Schema([int]).validate([1])
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_profile_memory_needs_tracemalloc(monkeypatch):
+    import sys
+    monkeypatch.setitem(sys.modules, 'tracemalloc', None)
+    with pytest.raises(RuntimeError):
+        profile(memory=True)
+    with profile() as stats:
+        Schema(int).validate(1)
+    assert stats.nodes['root'].calls == 1
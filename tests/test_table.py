@@ -0,0 +1,126 @@
+"""Tests for columnar validation of tables."""
+
+import pytest
+from decimal import Decimal
+from val import nullable, And, Convert, NotValid, Optional, Or, Schema
+
+RECORD = {
+    'id': Convert(int), 'price': Decimal,
+    Optional('note'): nullable(str, default=''), str: Or(float, None)}
+
+ROWS = [
+    {'id': '1', 'price': Decimal('1.5')},
+    {'id': 2, 'price': Decimal('2'), 'note': 'x', 'weight': 1.5},
+    {'id': 3, 'price': Decimal('0'), 'note': None, 'size': None},
+]
+
+
+def _errors(schema, table):
+    with pytest.raises(NotValid) as ctx:
+        schema.validate_table(table)
+    return ctx.value.args
+
+
+@pytest.mark.parametrize('definition', [RECORD, [RECORD], (RECORD,)])
+def test_table_rows_agree_with_row_validation(definition):
+    expected = [Schema(RECORD).validate(row) for row in ROWS]
+    assert Schema(definition).validate_table(ROWS) == expected
+    assert Schema(definition).validate_table(iter(ROWS)) == expected
+
+
+def test_table_of_columns():
+    schema = Schema([RECORD])
+    columns = {
+        'id': ['1', 2], 'price': (Decimal(1), Decimal(2)),
+        'note': ['a', None]}
+    assert schema.validate_table(columns) == [
+        {'id': 1, 'price': Decimal(1), 'note': 'a'},
+        {'id': 2, 'price': Decimal(2), 'note': ''}]
+    assert schema.validate_table(columns, output='columns') == {
+        'id': [1, 2], 'price': [Decimal(1), Decimal(2)], 'note': ['a', '']}
+    assert schema.validate_table({}) == []
+
+
+def test_table_columns_mark_missing_values_with_none():
+    assert Schema([RECORD]).validate_table(ROWS, output='columns') == {
+        'id': [1, 2, 3],
+        'price': [Decimal('1.5'), Decimal('2'), Decimal('0')],
+        'note': ['', 'x', ''],
+        'weight': [None, 1.5, None],
+        'size': [None, None, None]}
+
+
+def test_table_defaults_for_mandatory_keys_always_win():
+    schema = Schema({'key': int, Optional('key'): Schema(int, default=3)})
+    assert schema.validate_table([{'key': 1}, {'key': 2}]) == [
+        {'key': 3}, {'key': 3}]
+
+
+def test_table_errors_are_indexed_by_row():
+    schema = Schema([RECORD])
+    rows = [
+        {'id': 'x', 'price': Decimal(1)},
+        {'id': 1, 'price': Decimal(1)},
+        {'price': 2, 'weight': 'heavy', 'note': 3}]
+    assert _errors(schema, rows) == (
+        "0: 'id': invalid literal for int() with base 10: 'x'",
+        "2: missing key: 'id'",
+        "2: 'price': 2 is not of type %r" % (Decimal,),
+        "2: 'weight': 'heavy' not matched",
+        "2: 'note': 3 is not equal to None and 3 is not of type %r" % (
+            str,))
+    for index, row in enumerate(rows[2:], 2):
+        with pytest.raises(NotValid) as ctx:
+            Schema(RECORD).validate(row)
+        assert ['%d: %s' % (index, error) for error in ctx.value.args] == (
+            list(_errors(schema, rows)[1:]))
+    assert _errors(schema, {'price': [1]}) == (
+        "0: missing key: 'id'",
+        "0: 'price': 1 is not of type %r" % (Decimal,))
+
+
+def test_table_structure_errors():
+    schema = Schema([RECORD])
+    assert _errors(schema, [{'id': 1, 'price': Decimal(1)}, None, 'x']) == (
+        "1: None is not of type dict", "2: 'x' is not of type dict")
+    assert _errors(schema, {'id': [1, 2], 'price': [Decimal(1)]}) == (
+        "columns are not of equal length: {'id': 2, 'price': 1}",)
+    with pytest.raises(TypeError):
+        Schema([int]).validate_table([])
+    with pytest.raises(TypeError):
+        Schema([RECORD, RECORD]).validate_table([])
+    with pytest.raises(ValueError):
+        schema.validate_table([], output='frames')
+
+
+def test_table_max_errors():
+    seen = []
+
+    def named(value):
+        seen.append(value)
+        return True
+
+    schema = Schema([{'id': int, 'name': And(named, str)}], max_errors=2)
+    rows = [{'id': str(i), 'name': i} for i in range(1000)]
+    assert _errors(schema, rows) == (
+        "0: 'id': '0' is not of type %r" % (int,),
+        "1: 'id': '1' is not of type %r" % (int,),
+        'truncated: stopped after 2 errors')
+    assert seen == []
+    rows = [{'id': 1, 'name': 'a'}, {'id': 'x', 'name': 1}]
+    assert _errors(schema, rows) == (
+        "1: 'id': 'x' is not of type %r" % (int,),
+        "1: 'name': 1 is not of type %r" % (str,))
+
+
+def test_table_validates_each_value_once():
+    seen = []
+
+    def positive(value):
+        seen.append(value)
+        return value > 0
+
+    schema = Schema({'n': And(int, positive)})
+    assert schema.validate_table({'n': [1, 2, 3]}, output='columns') == {
+        'n': [1, 2, 3]}
+    assert seen == [1, 2, 3]
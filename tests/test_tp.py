@@ -190,3 +190,15 @@ def test_detects_broken_schemas(schema):
     """Invalid teleport schemas raise appropriate exceptions."""
     with pytest.raises(DeserializationError):
         to_val(schema)
+
+
+def test_defers_slow_imports():
+    """Importing val.tp does not import pyrfc3339 or json."""
+    import subprocess
+    import sys
+    output = subprocess.check_output([
+        sys.executable, '-c',
+        'import sys, val.tp; '
+        'print(sorted(set(["json", "pyrfc3339"]) & set(sys.modules)))'])
+    assert output.strip() == b'[]'
+    assert to_val("DateTime").validates("2015-04-05T14:30:00Z")
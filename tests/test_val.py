@@ -6,8 +6,10 @@ Eric Casteleijn, <thisfred@gmail.com>
 Vladimir Keleshev, <vladimir@keleshev.com>
 """
 
+import pickle
 import pytest
 import sys
+from decimal import Decimal
 from val import (
     nullable, And, BaseSchema, Convert, NotValid, Optional, Or, Ordered,
     Schema)
@@ -29,6 +31,30 @@ def test_must_implement_validated():
         schema.validate("whatever")
 
 
+class Even(BaseSchema):
+
+    """Schema subclass that only overrides validate()."""
+
+    def validate(self, data):
+        if data % 2:
+            raise NotValid('%r is odd' % (data,))
+        return data
+
+
+def test_subclasses_that_only_override_validate():
+    schema = Even()
+    assert schema.validates(2)
+    assert not schema.validates(3)
+    assert Schema(Or(Even(), str)).validates(2)
+    assert not Schema(Or(Even(), str)).validates(3)
+    assert Schema({'a': Even()}, copy_on_write=True).validate({'a': 2}) == {
+        'a': 2}
+    assert Schema([Even()]).validates([2, 4])
+    with pytest.raises(NotImplementedError):
+        Broken = type('Broken', (BaseSchema,), {})
+        Broken().validates(1)
+
+
 def test_identity():
     schema = Schema('test')
     assert schema.validate('test') == 'test'
@@ -494,3 +520,825 @@ def test_captures_multiple_errors():
     with pytest.raises(NotValid) as exception:
         schema.validate({'foo': 12, 'bar': 'qux'})
     assert len(exception.value.args) == 2
+
+
+class ExpensiveRepr(object):
+
+    """Object that counts how often it is rendered."""
+
+    renders = 0
+
+    def __repr__(self):
+        ExpensiveRepr.renders += 1
+        return '<expensive>'
+
+
+def test_discarded_errors_are_never_rendered():
+    ExpensiveRepr.renders = 0
+    schema = Schema(Or(int, str, {'key': int}, object))
+    data = ExpensiveRepr()
+    assert schema.validate(data) is data
+    assert Schema([int, object]).validates([data, data])
+    assert ExpensiveRepr.renders == 0
+
+
+def test_errors_are_rendered_on_access():
+    ExpensiveRepr.renders = 0
+    with pytest.raises(NotValid) as ctx:
+        Schema({'key': int}).validate({'key': ExpensiveRepr()})
+    assert ExpensiveRepr.renders == 0
+    assert ctx.value.args == ("'key': <expensive> is not of type %s" % (
+        repr(int),),)
+    assert str(ctx.value) == ctx.value.args[0]
+    assert ExpensiveRepr.renders == 1
+
+
+def test_errors_are_structured():
+    data = {'outer': {'inner': 'foo'}}
+    with pytest.raises(NotValid) as ctx:
+        Schema({'outer': {'inner': int}}).validate(data)
+    error, = ctx.value.errors
+    assert error.path == ('outer', 'inner')
+    assert error.value == 'foo'
+    assert error.expected is int
+    assert str(error) == "'outer': 'inner': 'foo' is not of type %s" % (
+        repr(int),)
+
+
+def test_error_messages_are_unchanged():
+    schema = Schema({'foo': Or(int, None), str: [int], 'qux': str})
+    with pytest.raises(NotValid) as ctx:
+        schema.validate({'foo': 'x', 'bar': ['1'], 12: 3})
+    assert ctx.value.args == (
+        "'foo': 'x' is not of type %r and 'x' is not equal to None" % (int,),
+        "missing key: 'qux'",
+        "'bar': ['1'] not matched",
+        "12: 3 not matched")
+    assert repr(ctx.value) == 'NotValid%r' % (ctx.value.args,)
+
+
+def test_not_valid_can_be_pickled():
+    with pytest.raises(NotValid) as ctx:
+        Schema({'key': int}).validate({'key': 'foo'})
+    copy = pickle.loads(pickle.dumps(ctx.value))
+    assert copy.args == ctx.value.args
+
+
+CHECKED_SCHEMAS = [
+    Schema(int),
+    Schema('foo'),
+    Schema(lambda x: x > 1),
+    Schema([int, 'foo']),
+    Schema((str,)),
+    Schema({'a': int, Optional('b'): Schema(str, default='x'), str: [int]}),
+    Schema({'key': Convert(int)}),
+    Or(int, {'a': str}, Convert(float)),
+    And(Convert(int), lambda n: 0 < n < 5),
+    Ordered([str, Convert(int)]),
+    nullable(str, default='foo'),
+    Schema(
+        {'foo': int}, additional_validators=(lambda value: value['foo'],)),
+]
+
+CHECKED_DATA = [
+    None, 0, 2, 3.5, '3', 'foo', [], [1, 'foo'], ['bar'], ('a',),
+    {'a': 1}, {'a': 1, 'b': 'c', 'd': [1]}, {'a': 1, 'd': 'x'}, {'key': '3'},
+    {'foo': 0}, {'foo': 1}, {'a': 'b'}, ['a', '3'], ['a', 'b'], ('a', 2)]
+
+
+@pytest.mark.parametrize('schema', CHECKED_SCHEMAS)
+def test_validates_agrees_with_validate(schema):
+    for data in CHECKED_DATA:
+        try:
+            schema.validate(data)
+        except NotValid:
+            valid = False
+        except Exception:
+            continue
+        else:
+            valid = True
+        assert schema.validates(data) is valid
+
+
+def test_validates_does_not_raise(monkeypatch):
+    created = []
+
+    def count(self, *args):
+        created.append(args)
+
+    schema = Schema({
+        'a': Or(int, [str], {'b': int}),
+        Optional('c'): Ordered([int, str]),
+        str: And(int, lambda n: n > 1)})
+    monkeypatch.setattr(NotValid, '__init__', count)
+    assert not schema.validates({'a': 'x'})
+    assert not schema.validates({'a': 1, 'c': [1, 2]})
+    assert not schema.validates({'a': 1, 'd': 0})
+    assert not schema.validates({})
+    assert schema.validates({'a': [], 'c': [1, 'x'], 'd': 2})
+    assert created == []
+
+
+def test_or_runs_converters_once():
+    calls = []
+
+    def converter(value):
+        calls.append(value)
+        return int(value)
+
+    schema = Or({'a': int}, Convert(converter))
+    assert schema.validate('12') == 12
+    assert calls == ['12']
+
+
+class CountingSchema(Schema):
+
+    """Schema that counts how often it validates."""
+
+    def __init__(self, *args, **kwargs):
+        super(CountingSchema, self).__init__(*args, **kwargs)
+        self.calls = 0
+
+    def validate(self, data):
+        self.calls += 1
+        return super(CountingSchema, self).validate(data)
+
+
+def test_items_of_types_or_a_single_definition():
+    assert Schema([int, str]).validate([1, 'a', True]) == [1, 'a', True]
+    assert Schema({int}).validate({1, 2}) == {1, 2}
+    assert Schema([Convert(int)]).validate(['1', 2]) == [1, 2]
+    for definition, data in [
+            ([int, str], [1, 1.5]), ((Convert(int),), (1, 'x'))]:
+        with pytest.raises(NotValid) as ctx:
+            Schema(definition).validate(data)
+        assert ctx.value.args == (
+            '%r invalidated by anything in %r.' % (data[1], definition),)
+
+
+def test_or_skips_alternatives_of_other_types():
+    number = CountingSchema(int)
+    mapping = CountingSchema({'a': int})
+    schema = Or(number, mapping, CountingSchema([int]), str, None)
+    assert schema.validate('foo') == 'foo'
+    assert schema.validate(None) is None
+    assert schema.validate({'a': 1}) == {'a': 1}
+    assert number.calls == 0
+    assert mapping.calls == 1
+
+
+def test_list_items_skip_alternatives_of_other_types():
+    number = CountingSchema(int)
+    schema = Schema([number, str, nullable(float)])
+    assert schema.validate(['a', None, 1.5, 'b']) == ['a', None, 1.5, 'b']
+    assert number.calls == 0
+    assert schema.validate([1]) == [1]
+    assert number.calls == 1
+
+
+def test_type_dispatch_keeps_first_match():
+    schema = Or(Convert(str), int)
+    assert schema.validate(1) == '1'
+    schema = Or(True, 1, int)
+    assert schema.validate(1) == 1
+    assert schema.validate(1.0) == 1.0
+    with pytest.raises(NotValid) as ctx:
+        Or(int, None, 'foo').validate(1.5)
+    assert ctx.value.args == (
+        "1.5 is not of type %r and 1.5 is not equal to None and "
+        "1.5 is not equal to 'foo'" % (int,),)
+
+
+def test_type_dispatch_respects_class_overrides():
+
+    class Proxy(object):
+
+        """Pretends to be an int."""
+
+        @property
+        def __class__(self):
+            return int
+
+    proxy = Proxy()
+    assert Or(str, int).validate(proxy) is proxy
+
+
+def test_dict_type_keys_dispatch_on_key_class():
+
+    class Name(str):
+
+        """A str subclass."""
+
+    schema = Schema({str: int, Name: str, object: float})
+    for _ in range(2):
+        assert schema.validate({'a': 1, Name('b'): 2, Name('c'): 'x'}) == {
+            'a': 1, Name('b'): 2, Name('c'): 'x'}
+        assert schema.validate({Name('d'): 1.5, 3: 1.5}) == {
+            Name('d'): 1.5, 3: 1.5}
+    with pytest.raises(NotValid) as ctx:
+        schema.validate({Name('b'): None})
+    assert ctx.value.args == ("'b': None not matched",)
+    checker = Schema({str: int, Name: str}, copy_on_write=True)
+    assert checker.validates({Name('b'): 'x', 'c': 1})
+    assert not checker.validates({'c': 'x'})
+
+
+def test_dict_type_keys_respect_class_overrides():
+
+    class Proxy(object):
+
+        """Pretends to be whatever it wraps."""
+
+        def __init__(self, wrapped):
+            self.wrapped = wrapped
+
+        def __hash__(self):
+            return id(self)
+
+        @property
+        def __class__(self):
+            return type(self.wrapped)
+
+    schema = Schema({int: 'int', str: 'str'})
+    for _ in range(2):
+        assert schema.validates({Proxy(1): 'int', Proxy('a'): 'str'})
+        assert not schema.validates({Proxy(1): 'str'})
+
+
+class Loose(object):
+
+    """Equal to everything, without being hashable."""
+
+    __hash__ = None
+
+    def __eq__(self, other):
+        return True
+
+
+LITERALS = ('a', 'b', 1, 2.5, None, False, 'c')
+
+
+def _single(data):
+    return data
+
+
+def _in_tuple(data):
+    return (data,)
+
+
+@pytest.mark.parametrize('schema, wrap', [
+    (Or(*LITERALS), _single),
+    (Schema(Or(*LITERALS), copy_on_write=True), _single),
+    (Schema(LITERALS), _in_tuple),
+    (Schema(LITERALS, copy_on_write=True), _in_tuple)])
+def test_literal_alternatives_keep_equality_rules(schema, wrap):
+    for data in ['a', 'c', 1, True, 1.0, 2.5, None, 0, False, 0.0,
+                 Decimal('2.5'), Loose()]:
+        assert schema.validate(wrap(data)) == wrap(data)
+    for data in ['d', b'a', 2, float('nan'), [], (1,)]:
+        assert not schema.validates(wrap(data))
+
+
+def test_literal_alternatives_keep_first_match():
+    schema = Or('a', 'b', Convert(int), 1, 2)
+    assert schema.validate('b') == 'b'
+    assert schema.validate(1.0) == 1
+    assert type(schema.validate(1.0)) is int
+    with pytest.raises(NotValid) as ctx:
+        Or('a', 'b').validate('c')
+    assert ctx.value.args == (
+        "'c' is not equal to 'a' and 'c' is not equal to 'b'",)
+
+
+def test_list_schemas_take_buffers_of_numbers_as_they_are():
+    import array
+    numbers = array.array('q', range(5))
+    assert Schema([int]).validate(numbers) is numbers
+    view = memoryview(numbers)
+    assert Schema([int]).validate(view) is view
+    reals = array.array('d', [0.5, 0.25])
+    assert Schema([float]).validate(reals) is reals
+    assert Schema([float]).validate(memoryview(reals)) is not None
+    assert Schema([float], copy_on_write=True).validate(reals) is reals
+    assert Schema([int]).validates(numbers)
+    assert Schema([int]).validate(array.array('d')) == array.array('d')
+    assert not Schema([int]).validates(memoryview(b'abcd').cast('B', [2, 2]))
+    assert not Schema([int, str]).validates(numbers)
+    assert not Schema((int,)).validates(numbers)
+
+
+def test_buffer_errors_point_at_the_first_invalid_item():
+    import array
+    with pytest.raises(NotValid) as ctx:
+        Schema([int]).validate(array.array('d', [1.5, 2.5]))
+    assert ctx.value.args == (
+        "0: 1.5 invalidated by anything in [%r]." % (int,),)
+    schema = Schema([And(float, lambda x: 0 <= x <= 1)])
+    assert schema.validates(array.array('f', [0.5, 1]))
+    with pytest.raises(NotValid) as ctx:
+        schema.validate(array.array('f', [0.5, 1, 2, 3]))
+    assert ctx.value.args[0].startswith('2: 2.0 invalidated by anything')
+
+
+def test_list_schemas_take_numpy_arrays():
+    numpy = pytest.importorskip('numpy')
+    numbers = numpy.arange(10)
+    assert Schema([int]).validate(numbers) is numbers
+    assert Schema([int]).validate(numbers[::2]) is not None
+    assert not Schema([float]).validates(numbers)
+    assert not Schema([int]).validates(numpy.zeros((2, 2), dtype=int))
+    schema = Schema([And(float, lambda x: x < 0.5)])
+    assert schema.validates(numpy.zeros(3))
+    with pytest.raises(NotValid) as ctx:
+        schema.validate(numpy.array([0.0, 0.75]))
+    assert ctx.value.args[0].startswith('1: 0.75 invalidated by anything')
+
+
+def test_validate_many():
+    schema = Schema({'id': int, Optional('name'): Schema(str, default='')})
+    validated, errors = schema.validate_many([{'id': 1}, {'id': 2}])
+    assert validated == [{'id': 1, 'name': ''}, {'id': 2, 'name': ''}]
+    assert errors == []
+
+
+def test_validate_many_raises_first_error():
+    with pytest.raises(NotValid) as ctx:
+        Schema(int).validate_many(x for x in [1, '2', 3.0])
+    assert ctx.value.args == ("'2' is not of type %r" % (int,),)
+
+
+def test_validate_many_collects_errors():
+    schema = Schema(int, additional_validators=(lambda n: n > 0,))
+    validated, errors = schema.validate_many(
+        [1, '2', 3, -4], on_error='collect')
+    assert validated == [1, 3]
+    assert [index for index, _ in errors] == [1, 3]
+    assert all(isinstance(error, NotValid) for _, error in errors)
+
+
+def test_validate_many_skips_invalid_items():
+    validated, errors = Or(int, None, default=0).validate_many(
+        iter([1, None, 'x', 2]), on_error='skip')
+    assert validated == [1, 0, 2]
+    assert errors == []
+
+
+def test_validate_many_rejects_unknown_error_handling():
+    with pytest.raises(ValueError):
+        Schema(int).validate_many([1], on_error='ignore')
+
+
+def test_iter_validate():
+    schema = Schema([int, Convert(int)])
+    items = schema.iter_validate(str(i) for i in range(3))
+    assert next(items) == 0
+    assert list(items) == [1, 2]
+
+
+def test_iter_validate_raises_first_error():
+    items = Schema((str,)).iter_validate(['a', 1, 2])
+    assert next(items) == 'a'
+    with pytest.raises(NotValid) as ctx:
+        next(items)
+    assert ctx.value.args == (
+        "1: 1 invalidated by anything in (%r,)." % (str,),)
+
+
+def test_iter_validate_yields_errors():
+    items = list(Schema([int]).iter_validate([1, 'a', 3], on_error='yield'))
+    assert items[0] == 1
+    assert isinstance(items[1], NotValid)
+    assert items[1].errors[0].path == (1,)
+    assert items[2] == 3
+
+
+def test_iter_validate_needs_iterable_schema():
+    with pytest.raises(TypeError):
+        Schema({'a': int}).iter_validate([])
+    with pytest.raises(ValueError):
+        Schema([int]).iter_validate([], on_error='skip')
+
+
+PICKLED_SCHEMAS = [
+    Schema({'id': int, Optional('tags'): [str], str: Or(int, None)}),
+    Schema([int, 'foo'], compile=True),
+    Or(int, {'a': str}, default=3),
+    nullable(str),
+    And(Convert(int), Or(1, 2)),
+    Ordered([str, int]),
+]
+
+
+@pytest.mark.parametrize('schema', PICKLED_SCHEMAS)
+def test_schemas_can_be_pickled(schema):
+
+    def outcome(schema, data):
+        try:
+            return schema.validate(data)
+        except Exception as ex:
+            return type(ex), str(ex)
+
+    copy = pickle.loads(pickle.dumps(schema))
+    for data in CHECKED_DATA + [{'id': 1, 'tags': ['a'], 'b': None}, '2']:
+        assert outcome(copy, data) == outcome(schema, data)
+
+
+def test_validate_many_in_worker_processes():
+    schema = Schema({'id': int, Optional('name'): Schema(str, default='')})
+    items = [{'id': i} if i % 10 else {'id': str(i)} for i in range(100)]
+    validated, errors = schema.validate_many(
+        items, on_error='collect', workers=2)
+    assert validated == [
+        {'id': i, 'name': ''} for i in range(100) if i % 10]
+    assert [index for index, _ in errors] == list(range(0, 100, 10))
+    assert errors[1][1].args == (
+        "'id': '10' is not of type %r" % (int,),)
+    with pytest.raises(NotValid):
+        schema.validate_many(items, workers=2)
+
+
+def test_cache_remembers_results():
+    calls = []
+
+    def counted(value):
+        calls.append(value)
+        return value > 0
+
+    schema = Schema(Or(counted, (int,)), cache_size=10)
+    assert schema.validate(1) == 1
+    assert schema.validate(1) == 1
+    assert calls == [1]
+    with pytest.raises(NotValid) as first:
+        schema.validate(-1)
+    with pytest.raises(NotValid) as second:
+        schema.validate(-1)
+    assert first.value is not second.value
+    assert second.value.args == first.value.args
+    assert calls == [1, -1]
+    assert not schema.validates(-1)
+    assert schema.validate((1, 2)) == (1, 2)
+    assert schema.cache_info() == (3, 3, 10, 3)
+    schema.cache_clear()
+    assert schema.cache_info() == (0, 0, 10, 0)
+
+
+def test_cache_keeps_equal_values_of_different_types_apart():
+    schema = Schema(Or(int, float), cache_size=10)
+    for value in (1, True, 1.0, 0.0, -0.0):
+        assert type(schema.validate(value)) is type(value)
+    assert str(schema.validate(-0.0)) == '-0.0'
+    assert schema.cache_info().currsize == 5
+
+
+def test_cache_evicts_least_recently_used():
+    schema = Schema(int, cache_size=2)
+    schema.validate(1)
+    schema.validate(2)
+    schema.validate(1)
+    schema.validate(3)
+    assert schema.cache_info().currsize == 2
+    schema.validate(1)
+    schema.validate(2)
+    assert schema.cache_info().hits == 2
+
+
+def test_cache_skips_mutable_data_and_results():
+    schema = Schema(Or([int], Ordered([int])), cache_size=10)
+    assert schema.validate([1]) == [1]
+    assert schema.validate((1,)) == [1]
+    assert schema.validate((1,)) is not schema.validate((1,))
+    assert schema.cache_info().currsize == 0
+
+
+def test_cache_is_not_used_with_converters():
+    schema = Schema({'a': Convert(int)}, cache_size=10)
+    assert schema.validate({'a': '1'}) == {'a': 1}
+    schema = Schema(Or(None, Convert(int)), cache_size=10)
+    assert schema.validate('1') == 1
+    assert schema.cache_info().currsize == 0
+
+
+def test_cached_schemas_can_be_pickled():
+    schema = Schema(int, cache_size=10)
+    schema.validate(1)
+    copy = pickle.loads(pickle.dumps(schema))
+    assert copy.cache_info() == (0, 0, 10, 0)
+    assert copy.validate(1) == 1
+
+
+def test_equal_definitions_share_validators():
+    zip_code = Or(int, None)
+
+    def address():
+        return {'street': str, Optional('zip'): zip_code, 'tags': [str]}
+
+    first = Schema({'home': address(), 'work': address()})
+    second = Schema(address())
+    assert first.schema is not second.schema
+    assert Schema(address()).schema is second.schema
+    assert Schema({'home': address()}).schema is not first.schema
+    assert first.validate({
+        'home': {'street': 'a', 'tags': []},
+        'work': {'street': 'b', 'zip': 1, 'tags': ['c']}})
+
+
+def test_definitions_with_unhashable_schemas_are_not_shared():
+
+    class Eq(BaseSchema):
+
+        def __init__(self, value):
+            super(Eq, self).__init__()
+            self.value = value
+
+        def __eq__(self, other):
+            return isinstance(other, Eq) and other.value == self.value
+
+        def _validated(self, data):
+            if data != self.value:
+                raise NotValid('%r is not %r' % (data, self.value))
+            return data
+
+    schema = Schema({'a': Eq(1)})
+    assert schema.validate({'a': 1}) == {'a': 1}
+    assert not Schema({'a': Eq(2)}).validates({'a': 1})
+    assert Schema([{'a': Eq(1)}], compile=True).validates([{'a': 1}])
+
+
+def test_definitions_of_different_types_do_not_share_validators():
+    schemas = [Schema(value) for value in (1, True, 1.0, [1], (1,), [True])]
+    assert len(set(id(schema.schema) for schema in schemas)) == len(schemas)
+    with pytest.raises(NotValid) as ctx:
+        schemas[2].validate(2)
+    assert ctx.value.args == ('2 is not equal to 1.0',)
+    assert schemas[5].validates([True])
+
+
+def test_lazy_schema_is_built_on_first_use():
+    schema = Schema({'a': int}, lazy=True)
+    assert 'schema' not in vars(schema)
+    assert schema.definition == {'a': int}
+    assert schema.validates({'a': 1})
+    assert 'schema' in vars(schema)
+    assert schema.validate({'a': 1}) == {'a': 1}
+    with pytest.raises(AttributeError):
+        schema.missing
+
+
+def test_lazy_schema_is_built_once_by_concurrent_threads(monkeypatch):
+    import threading
+    import time
+    from val import _val
+    builds = []
+
+    def slow_parse_schema(definition, max_errors=None):
+        builds.append(definition)
+        time.sleep(0.01)
+        return lambda data: data
+
+    monkeypatch.setattr(_val, 'parse_schema', slow_parse_schema)
+    schema = Schema(int, lazy=True)
+    threads = [
+        threading.Thread(target=schema.validate, args=(1,))
+        for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert builds == [int]
+
+
+def test_lazy_schema_options():
+    schema = Schema(int, lazy=True, cache_size=2, default=3)
+    assert schema.cache_info() == (0, 0, 2, 0)
+    assert schema.validate(1) == 1
+    copy = pickle.loads(pickle.dumps(Schema([int], lazy=True)))
+    assert copy.validate([1]) == [1]
+
+
+def test_copy_on_write_returns_unchanged_data():
+    schema = Schema({
+        'items': [{'id': int, Optional('tags'): (str,)}],
+        'names': set([str]), str: object}, copy_on_write=True)
+    data = {
+        'items': [{'id': 1, 'tags': ('a',)}, {'id': 2}],
+        'names': set(['x']), 'extra': []}
+    assert schema.validate(data) is data
+    assert Schema(schema.definition).validate(data) is not data
+
+
+def test_copy_on_write_only_copies_changed_containers():
+    schema = Schema({
+        'items': [{'id': Convert(int)}],
+        'meta': {'name': str, Optional('size'): Schema(int, default=0)},
+        'other': [str]}, copy_on_write=True)
+    data = {
+        'items': [{'id': 1}, {'id': '2'}],
+        'meta': {'name': 'x'},
+        'other': ['y']}
+    validated = schema.validate(data)
+    assert validated == {
+        'items': [{'id': 1}, {'id': 2}],
+        'meta': {'name': 'x', 'size': 0},
+        'other': ['y']}
+    assert validated is not data
+    assert validated['items'] is not data['items']
+    assert validated['items'][0] is data['items'][0]
+    assert validated['items'][1] is not data['items'][1]
+    assert validated['meta'] is not data['meta']
+    assert validated['other'] is data['other']
+    assert data == {
+        'items': [{'id': 1}, {'id': '2'}],
+        'meta': {'name': 'x'},
+        'other': ['y']}
+
+
+def test_copy_on_write_errors_and_options():
+    schema = Schema(
+        {'a': [int]}, copy_on_write=True,
+        additional_validators=(lambda value: len(value['a']) < 3,))
+    data = {'a': [1, 2]}
+    assert schema.validate(data) is data
+    with pytest.raises(NotValid) as ctx:
+        schema.validate({'a': [1, 'x']})
+    assert ctx.value.args == (
+        "'a': 'x' invalidated by anything in %r." % ([int],),)
+    assert not schema.validates({'a': [1, 2, 3]})
+    validated, errors = schema.validate_many(
+        [data, {'a': []}, {}], on_error='collect')
+    assert validated[0] is data
+    assert [index for index, _ in errors] == [2]
+
+
+def test_max_errors_stops_dictionary_validation():
+    calls = []
+
+    def counted(value):
+        calls.append(value)
+        return value > 0
+
+    schema = Schema({str: counted}, max_errors=3)
+    data = dict(('key%d' % (i,), -i) for i in range(1, 1001))
+    with pytest.raises(NotValid) as ctx:
+        schema.validate(data)
+    assert len(calls) == 4
+    assert len(ctx.value.args) == 4
+    assert ctx.value.args[-1] == 'truncated: stopped after 3 errors'
+    assert Schema({str: counted}, max_errors=3).validate({'a': 1}) == {
+        'a': 1}
+    with pytest.raises(NotValid) as ctx:
+        schema.validate({'a': -1, 'b': -2})
+    assert len(ctx.value.args) == 2
+
+
+def test_max_errors_of_one_fails_fast():
+    schema = Schema({'a': int, 'b': int, 'c': int}, max_errors=1)
+    with pytest.raises(NotValid) as ctx:
+        schema.validate({})
+    assert ctx.value.args == (
+        "missing key: 'a'", 'truncated: stopped after 1 error')
+
+
+def test_max_errors_only_truncates_when_errors_are_left_out():
+    for compile in (False, True):
+        schema = Schema({'a': int, 'b': int}, max_errors=1, compile=compile)
+        with pytest.raises(NotValid) as ctx:
+            schema.validate({'a': 'x', 'b': 1})
+        assert ctx.value.args == ("'a': 'x' is not of type %r" % (int,),)
+        schema = Schema({'a': int, 'b': int}, max_errors=2, compile=compile)
+        with pytest.raises(NotValid) as ctx:
+            schema.validate({})
+        assert len(ctx.value.args) == 2
+
+
+def test_max_errors_counts_nested_errors():
+    schema = Schema(
+        {'a': {'b': int, 'c': int, 'd': int}, 'e': int}, max_errors=2)
+    with pytest.raises(NotValid) as ctx:
+        schema.validate({'a': {}, 'e': 'x'})
+    assert ctx.value.args == (
+        "'a': missing key: 'b'", "'a': missing key: 'c'",
+        'truncated: stopped after 2 errors')
+    calls = []
+    schema = Schema([{str: calls.append}], max_errors=1)
+    with pytest.raises(NotValid):
+        schema.validate([{'a': 1, 'b': 2}])
+    assert calls == [1, 2]
+
+
+@pytest.mark.parametrize('schema', [
+    Ordered([{'a': int, 'b': int}], max_errors=1),
+    And({'a': int, 'b': int}, dict, max_errors=1),
+    Or(None, {'a': int, 'b': int}, max_errors=1),
+])
+def test_max_errors_applies_to_other_schemas(schema):
+    data = [{}] if isinstance(schema, Ordered) else {}
+    with pytest.raises(NotValid) as ctx:
+        schema.validate(data)
+    assert 'truncated: stopped after 1 error' in str(ctx.value)
+    assert "'b'" not in str(ctx.value)
+
+
+def test_or_dispatches_on_tag():
+    calls = []
+
+    def counted(value):
+        calls.append(value)
+        return True
+
+    schema = Or(*[
+        {'type': 'event%d' % (i,), 'value': counted} for i in range(60)])
+    assert schema.validate({'type': 'event42', 'value': 1}) == {
+        'type': 'event42', 'value': 1}
+    assert calls == [1]
+    assert schema.validates({'type': 'event59', 'value': 2})
+    assert calls == [1, 2]
+
+
+def test_or_errors_focus_on_tagged_branch():
+    schema = Or(
+        {'type': 'click', 'x': int, 'y': int},
+        {'type': 'view', 'page': str},
+        None)
+    with pytest.raises(NotValid) as ctx:
+        schema.validate({'type': 'view', 'page': 1})
+    assert ctx.value.args == (
+        "'page': 1 is not of type %r and "
+        "{'type': 'view', 'page': 1} is not equal to None" % (str,),)
+    with pytest.raises(NotValid) as ctx:
+        schema.validate({'type': 'scroll'})
+    assert ctx.value.args == (
+        "'type': 'scroll' is not one of ('click', 'view') and "
+        "{'type': 'scroll'} is not equal to None",)
+    with pytest.raises(NotValid) as ctx:
+        schema.validate({})
+    assert ctx.value.args[0].startswith("missing key: 'type' and ")
+    assert schema.validate(None) is None
+
+
+def test_or_tag_dispatch_keeps_alternative_order():
+    schema = Or(
+        {'type': 1, 'x': int}, dict, {'type': 'b', 'y': int},
+        {'type': True, 'z': int})
+    assert schema.validate({'type': 1, 'x': 'a'}) == {'type': 1, 'x': 'a'}
+    assert schema.validate({'type': 'c'}) == {'type': 'c'}
+    assert schema.validate({'type': [1]}) == {'type': [1]}
+    tagged = Or({'type': 1, 'x': int}, {'type': True, 'z': int})
+    assert tagged.validate({'type': True, 'z': 1}) == {'type': True, 'z': 1}
+    assert tagged.validate({'type': 1.0, 'x': 1}) == {'type': 1.0, 'x': 1}
+    assert not tagged.validates({'type': float('nan'), 'x': 1})
+
+
+EVENTS = [
+    Schema({'type': 'click', 'x': int}), And({'type': 'view', 'page': str}),
+    {'type': 'scroll', Optional('by'): int}, [int], (str, int)]
+
+
+def test_adaptive_or_tries_frequent_alternatives_first():
+    schema = Or(*EVENTS, adaptive=True)
+    assert schema.branch_info() == ((0, 1, 2, 3, 4), (0,) * 5, True)
+    for _ in range(600):
+        assert schema.validates({'type': 'scroll', 'by': 1})
+        assert schema.validate(('a', 1)) == ('a', 1)
+    assert schema.validate([1]) == [1]
+    assert schema.branch_info() == (
+        (2, 4, 0, 1, 3), (0, 0, 600, 1, 600), True)
+    copy = pickle.loads(pickle.dumps(schema))
+    assert copy.branch_info() == schema.branch_info()
+
+
+@pytest.mark.parametrize('data', [
+    {'type': 'click', 'x': 1}, {'type': 'view', 'page': 1},
+    {'type': 'other'}, {'type': ['scroll']}, [1, 'a'], ('a',), 'click'])
+def test_adaptive_or_validates_like_first_match(data):
+    schema = Or(*EVENTS, adaptive=True)
+    for _ in range(1000):
+        schema.validates({'type': 'scroll'})
+    assert schema.branch_info().order[0] == 2
+    try:
+        expected = Or(*EVENTS).validate(data)
+    except NotValid as ex:
+        with pytest.raises(NotValid) as ctx:
+            schema.validate(data)
+        assert ctx.value.args == ex.args
+        assert not schema.validates(data)
+    else:
+        assert schema.validate(data) == expected
+
+
+def test_adaptive_or_keeps_order_of_overlapping_alternatives():
+
+    class Anything(object):
+
+        def __eq__(self, other):
+            return True
+
+    tagged = Or(
+        Schema({'type': 1, 'x': int}), Schema({'type': 2, 'x': int}),
+        adaptive=True)
+    for _ in range(1000):
+        tagged.validate({'type': 2, 'x': 1})
+        tagged.validate({'type': Anything(), 'x': 1})
+    assert tagged.branch_info() == ((1, 0), (0, 1000), True)
+    assert not Or({'a': int}, {'b': int}, adaptive=True).branch_info()[2]
+    assert not Or(dict, {'type': 1}, adaptive=True).branch_info().adaptive
+    assert not Or(int, str).branch_info().adaptive
@@ -1,5 +1,32 @@
+import sys
+
 from ._val import *  # noqa
 from .exceptions import *  # noqa
 
-__all__ = _val.__all__ + exceptions.__all__
+# Names from modules that are only imported when they are first used, so
+# that importing val stays fast.
+LAZY = {
+    'profile': '_profile',
+    'Length': '_constraints', 'OneOf': '_constraints',
+    'Pattern': '_constraints', 'Range': '_constraints',
+    'optimize': '_optimizer'}
+
+if sys.version_info < (3, 7):  # pragma: nocover
+    # Modules can not look up missing attributes themselves.
+    from ._profile import *  # noqa
+    from ._constraints import *  # noqa
+    from ._optimizer import *  # noqa
+else:
+    def __getattr__(name):
+        module = LAZY.get(name)
+        if module is None:
+            raise AttributeError(
+                "module 'val' has no attribute '%s'" % (name,))
+
+        from importlib import import_module
+        value = globals()[name] = getattr(
+            import_module('val.' + module), name)
+        return value
+
+__all__ = _val.__all__ + exceptions.__all__ + sorted(LAZY)
 __version__ = '0.8dev0'
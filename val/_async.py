@@ -0,0 +1,373 @@
+"""
+Asynchronous validation, for schemas with coroutine validators.
+
+Callables, converters and additional validators anywhere in a definition can
+be `async def` functions (or return any other awaitable). Values of
+independent dictionary keys and list items are validated concurrently, and
+the number of awaitables in flight can be limited.
+
+Copyright (c) 2013-2015
+Eric Casteleijn, <thisfred@gmail.com>
+"""
+
+import asyncio
+import inspect
+
+from val._val import (
+    And, BaseSchema, Convert, Or, Ordered, Schema,
+    _build_mismatch_validator, _build_type_dispatch, _determine_keys, _is_pure,
+    _validates_itself, parse_schema)
+from val.exceptions import Alternatives, Error, NotValid, prefixed
+
+__all__ = ['validate_async']
+
+
+class _Unlimited(object):
+
+    """Limiter that lets every awaitable through."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+async def _call(function, data, limiter):
+    """Call function, and await the result if needed."""
+    async with limiter:
+        result = function(data)
+        if inspect.isawaitable(result):
+            result = await result
+    return result
+
+
+def _build_sync(validator):
+    """Build an asynchronous validator from a synchronous one."""
+
+    async def sync_validator(data, limiter):
+        """Validate synchronously."""
+        return validator(data)
+
+    return sync_validator
+
+
+def _build_callable_validator(function):
+    """Build a validator that checks the (awaited) result of function."""
+
+    async def callable_validator(data, limiter):
+        """Validate by checking the return value of function(data)."""
+        try:
+            if await _call(function, data, limiter):
+                return data
+
+        except (TypeError, ValueError, NotValid) as ex:
+            raise NotValid(ex.args)
+
+        raise NotValid(
+            Error(
+                "%(value)r invalidated by '%(description)s'", data,
+                function))
+
+    return callable_validator
+
+
+def _build_item_validator(iterable):
+    """Build a validator for the items of an iterable."""
+    sub_schemas = [_build(s) for s in iterable]
+
+    async def item_validator(value, limiter):
+        """Validate items in an iterable."""
+        for sub in sub_schemas:
+            try:
+                return await sub(value, limiter)
+
+            except NotValid:
+                pass
+
+        raise NotValid(
+            Error(
+                '%(value)r invalidated by anything in %(expected)s.', value,
+                iterable))
+
+    return item_validator
+
+
+async def _outcome(job):
+    """Await job, and return whether it raised, with the result or the
+    exception."""
+    try:
+        return False, await job
+    except Exception as ex:
+        return True, ex
+
+
+async def _gather(jobs):
+    """Await all jobs concurrently, and return their outcomes in order."""
+    return await asyncio.gather(*[_outcome(job) for job in jobs])
+
+
+def _raise_first(outcomes):
+    """Raise the first exception in outcomes, or return all results."""
+    for raised, result in outcomes:
+        if raised:
+            raise result
+
+    return [result for _, result in outcomes]
+
+
+def _build_iterable_validator(iterable):
+    """Build a validator that validates all items concurrently."""
+    item_validator = _build_item_validator(iterable)
+    mismatch_validator = _build_mismatch_validator(iterable)
+
+    async def iterable_validator(data, limiter):
+        """Validate an iterable."""
+        if not type(data) is type(iterable):
+            return mismatch_validator(data)
+
+        outcomes = await _gather(
+            [item_validator(value, limiter) for value in data])
+        return type(iterable)(_raise_first(outcomes))
+
+    return iterable_validator
+
+
+async def _validate_type_key(key, value, types, limiter):
+    """Validate a key's value by type, with a type dispatch function."""
+    for value_schema in types(key):
+        try:
+            return await value_schema(value, limiter)
+        except NotValid:
+            continue
+
+    raise NotValid(Error('%(value)r not matched', value, path=(key,)))
+
+
+def _schedule(data, mandatory, optional, types, limiter):
+    """Return the keys to validate in order, with an awaitable for each.
+
+    Missing mandatory keys get their error instead of an awaitable.
+
+    """
+    keys = []
+    jobs = []
+    for key, sub_schema in mandatory.items():
+        keys.append(key)
+        if key not in data:
+            jobs.append(Error('missing key: %(expected)r', data, key))
+            continue
+        jobs.append(sub_schema(data[key], limiter))
+    for key, value in data.items():
+        if key in mandatory:
+            continue
+        keys.append(key)
+        if key in optional:
+            jobs.append(optional[key](value, limiter))
+            continue
+        jobs.append(_validate_type_key(key, value, types, limiter))
+    return keys, jobs
+
+
+async def _gather_jobs(jobs):
+    """Await all awaitable jobs concurrently, and return the outcomes of all
+    jobs in order.
+
+    Errors for missing keys are outcomes that raised.
+
+    """
+    awaited = iter(await _gather(
+        [job for job in jobs if not isinstance(job, Error)]))
+    return [
+        (True, job) if isinstance(job, Error) else next(awaited)
+        for job in jobs]
+
+
+def _collect(keys, outcomes, mandatory, optional):
+    """Build the validated dictionary and the list of errors."""
+    _raise_first(
+        (raised, result) for raised, result in outcomes
+        if raised and not isinstance(result, (Error, NotValid)))
+    validated = {}
+    errors = []
+    for key, (raised, result) in zip(keys, outcomes):
+        if not raised:
+            validated[key] = result
+        elif isinstance(result, Error):
+            errors.append(result)
+        elif key in mandatory or key in optional:
+            errors.extend([prefixed(key, e) for e in result.errors])
+        else:
+            errors.extend(result.errors)
+    return validated, errors
+
+
+def _build_dict_validator(dictionary):
+    """Build a validator that validates all values concurrently."""
+    mandatory, optional, types, defaults = _determine_keys(
+        dictionary, parse=_build)
+    types = _build_type_dispatch(types)
+
+    async def dict_validator(data, limiter):
+        """Validate dictionaries."""
+        if not isinstance(data, dict):
+            raise NotValid(Error('%(value)r is not of type dict', data))
+
+        keys, jobs = _schedule(data, mandatory, optional, types, limiter)
+        outcomes = await _gather_jobs(jobs)
+        validated, errors = _collect(keys, outcomes, mandatory, optional)
+        if errors:
+            raise NotValid(*errors)
+        for key, (default, _) in defaults.items():
+            if key not in data or key in mandatory:
+                validated[key] = default
+
+        return validated
+
+    return dict_validator
+
+
+def _build_or(schema):
+    """Build a validator for the alternatives of an Or schema."""
+    sub_schemas = [_build(value) for value in schema.values]
+
+    positions = tuple(range(len(sub_schemas)))
+
+    async def or_validator(data, limiter):
+        """Validate data if any subschema validates it.
+
+        Tagged dictionaries are only validated with the alternatives for
+        their tag, like `Or.validate()` does.
+
+        """
+        selected = None
+        if schema._tags is not None and isinstance(data, dict):
+            selected = schema._tagged(data)
+        tried, error = selected or (positions, None)
+        errors = [] if error is None else [error]
+        for position in tried:
+            try:
+                return await sub_schemas[position](data, limiter)
+            except NotValid as ex:
+                errors.extend(ex.errors)
+
+        raise NotValid(Alternatives(errors))
+
+    return or_validator
+
+
+def _build_and(schema):
+    """Build a validator for the subschemas of an And schema."""
+    sub_schemas = [_build(value) for value in schema.values]
+
+    async def and_validator(data, limiter):
+        """Validate data if all subschemas validate it."""
+        for sub in sub_schemas:
+            data = await sub(data, limiter)
+        return data
+
+    return and_validator
+
+
+def _build_convert(schema):
+    """Build a validator for a Convert schema."""
+
+    async def convert_validator(data, limiter):
+        """Convert data or die trying."""
+        try:
+            return await _call(schema.convert, data, limiter)
+        except (TypeError, ValueError) as ex:
+            raise NotValid(*ex.args)
+
+    return convert_validator
+
+
+def _build_ordered(schema):
+    """Build a validator that validates all values concurrently."""
+    sub_schemas = [_build(sub) for sub in schema.schemas]
+
+    async def ordered_validator(values, limiter):
+        """Validate if the values are validated one by one in order."""
+        if schema.length != len(values):
+            # Raises the error for the wrong number of values.
+            return schema._validated(values)
+
+        outcomes = await _gather(
+            [sub(value, limiter) for sub, value in zip(sub_schemas, values)])
+        return type(schema.schemas)(_raise_first(outcomes))
+
+    return ordered_validator
+
+
+BUILDERS = (
+    (Schema, lambda schema: _build(schema.definition)),
+    (Or, _build_or),
+    (And, _build_and),
+    (Convert, _build_convert),
+    (Ordered, _build_ordered))
+
+
+def _build_inner(schema):
+    """Build a validator for a BaseSchema, without its own validators."""
+    for schema_class, builder in BUILDERS:
+        if isinstance(schema, schema_class):
+            return builder(schema)
+
+    return _build_sync(schema._validated)
+
+
+def _build_schema(schema):
+    """Build a validator for a BaseSchema."""
+    if schema._is_pure() or _validates_itself(type(schema)):
+        return _build_sync(schema.validate)
+
+    inner = _build_inner(schema)
+    additional = schema.additional_validators
+
+    async def schema_validator(data, limiter):
+        """Validate data, then run the additional validators."""
+        validated = await inner(data, limiter)
+        results = await asyncio.gather(
+            *[_call(validator, validated, limiter)
+              for validator in additional])
+        errors = [
+            Error(
+                "%(value)s invalidated by '%(description)s'", validated,
+                validator)
+            for validator, result in zip(additional, results) if not result]
+        if errors:
+            raise NotValid(*errors)
+
+        return schema._defaulted(validated)
+
+    return schema_validator
+
+
+def _build(schema):
+    """Build an asynchronous validator from a val schema definition."""
+    if isinstance(schema, BaseSchema):
+        built = getattr(schema, '_async_validator', None)
+        if built is None:
+            built = schema._async_validator = _build_schema(schema)
+        return built
+
+    if _is_pure(schema):
+        return _build_sync(parse_schema(schema))
+
+    if isinstance(schema, dict):
+        return _build_dict_validator(schema)
+
+    if type(schema) in (list, tuple, set):
+        return _build_iterable_validator(schema)
+
+    return _build_callable_validator(schema)
+
+
+async def validate_async(schema, data, concurrency=None):
+    """Validate data with a schema that may contain coroutine validators.
+
+    At most `concurrency` awaitables are awaited at the same time, if given.
+
+    """
+    limiter = asyncio.Semaphore(concurrency) if concurrency else _Unlimited()
+    return await _build(schema)(data, limiter)
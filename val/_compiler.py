@@ -0,0 +1,384 @@
+"""
+Compile val schema definitions into generated Python source.
+
+Instead of a tree of nested closures, every dictionary and iterable in a
+definition becomes a single generated function in which type checks,
+equality checks, key lookups and defaults are inlined. The generated code
+must behave exactly like the closures built by `parse_schema`.
+
+Copyright (c) 2013-2015
+Eric Casteleijn, <thisfred@gmail.com>
+"""
+
+import itertools
+
+from val._val import (
+    BaseSchema, Optional, TAG_TYPES, UNSPECIFIED,
+    _build_mismatch_validator, _is_tag)
+from val.exceptions import Error, NotValid, prefixed, truncated
+
+__all__ = ['compile_schema']
+
+INDENT = '    '
+FILENAME = '<val compiled schema>'
+
+
+def _raise(message):
+    """Failure handler that raises NotValid with a single error."""
+    return ['raise NotValid(%s)' % (message,)]
+
+
+def _raise_all(errors):
+    """Failure handler that raises NotValid with all errors."""
+    return ['raise NotValid(*%s)' % (errors,)]
+
+
+def _ignore(_):
+    """Failure handler that moves on to the next alternative."""
+    return ['pass']
+
+
+def _return(result):
+    """Success handler that returns the validated value."""
+    return ['return %s' % (result,)]
+
+
+def _indented(lines):
+    """Indent generated lines one level."""
+    return [INDENT + line for line in lines]
+
+
+class _Compiler(object):
+
+    """Generate the source for a schema definition."""
+
+    def __init__(self, max_errors=None):
+        self.max_errors = max_errors
+        self.namespace = {
+            'Error': Error, 'NotValid': NotValid, 'prefixed': prefixed,
+            'truncated': truncated}
+        self.functions = []
+        self.tables = []
+        self.compiled = {}
+        self.counter = 0
+
+    def name(self, prefix):
+        """Generate a unique name."""
+        self.counter += 1
+        return '%s_%d' % (prefix, self.counter)
+
+    def constant(self, value, prefix='c'):
+        """Bind value in the namespace of the generated code."""
+        name = self.name(prefix)
+        self.namespace[name] = value
+        return name
+
+    def table(self, prefix, dictionary, function):
+        """Generate a dictionary mapping keys to generated functions."""
+        name = self.name(prefix)
+        items = ', '.join(
+            '%s: %s' % (self.constant(key, 'key'), function(value))
+            for key, value in dictionary.items())
+        self.tables.append('%s = {%s}' % (name, items))
+        return name
+
+    def callee(self, definition):
+        """Get the name of a function that validates definition."""
+        if isinstance(definition, BaseSchema):
+            return self.constant(definition.validate, 'schema')
+
+        return self.function(definition)
+
+    def function(self, definition):
+        """Generate a validating function for definition, return its name."""
+        key = id(definition)
+        if key in self.compiled:
+            return self.compiled[key]
+
+        if isinstance(definition, dict):
+            name = self.name('dict_validator')
+            body = self.dict_body(definition)
+        elif type(definition) in (list, tuple, set):
+            name = self.name('iterable_validator')
+            body = self.iterable_body(definition)
+        else:
+            name = self.name('validator')
+            body = self.emit(definition, 'data', _return, _raise, _raise_all)
+        self.compiled[key] = name
+        self.functions.append(
+            ['def %s(data):' % (name,)] + _indented(body))
+        return name
+
+    def emit(self, definition, source, success, failure, failures):
+        """Generate code that validates the value in `source`.
+
+        `success` gets an expression for the validated value, `failure` an
+        expression for a single error and `failures` an expression for a
+        sequence of errors, and each returns the lines to generate for that
+        outcome.
+
+        """
+        if isinstance(definition, BaseSchema):
+            return self.emit_call(
+                self.constant(definition.validate, 'schema'), source,
+                success, failures)
+
+        if type(definition) is type:
+            return self.emit_type(definition, source, success, failure)
+
+        if isinstance(definition, dict) or \
+                type(definition) in (list, tuple, set):
+            return self.emit_call(
+                self.function(definition), source, success, failures)
+
+        if callable(definition):
+            return self.emit_callable(definition, source, success, failure)
+
+        return self.emit_static(definition, source, success, failure)
+
+    def emit_type(self, value_type, source, success, failure):
+        """Generate an inlined isinstance check."""
+        name = self.constant(value_type, 'type')
+        return (
+            ['if isinstance(%s, %s):' % (source, name)] +
+            _indented(success(source)) +
+            ['else:'] +
+            _indented(failure(
+                "Error('%%(value)r is not of type %%(expected)r', %s, %s)" % (
+                    source, name))))
+
+    def emit_static(self, exact_value, source, success, failure):
+        """Generate an inlined equality check."""
+        name = self.constant(exact_value, 'value')
+        return (
+            ['if %s == %s:' % (source, name)] +
+            _indented(success(source)) +
+            ['else:'] +
+            _indented(failure(
+                "Error('%%(value)r is not equal to %%(expected)r', %s, %s)" % (
+                    source, name))))
+
+    def emit_literals(self, values, source):
+        """Generate a test for a run of literals, returning a match.
+
+        Literal data is looked up in a frozenset, other data is compared to
+        every literal in turn.
+
+        """
+        return [
+            'if (%s in %s if type(%s) in %s else %s):' % (
+                source, self.constant(frozenset(values), 'values'), source,
+                self.constant(TAG_TYPES, 'types'),
+                ' or '.join(
+                    '%s == %s' % (source, self.constant(value, 'value'))
+                    for value in values)),
+            INDENT + 'return %s' % (source,)]
+
+    def emit_callable(self, function, source, success, failure):
+        """Generate an inlined call to a predicate."""
+        name = self.constant(function, 'function')
+        return (
+            ['try:',
+             INDENT + 'ok = True if %s(%s) else False' % (name, source),
+             'except (TypeError, ValueError, NotValid) as ex:'] +
+            _indented(failure('ex.args')) +
+            ['else:',
+             INDENT + 'if ok:'] +
+            _indented(_indented(success(source))) +
+            [INDENT + 'else:'] +
+            _indented(_indented(failure(
+                "Error(\"%%(value)r invalidated by '%%(description)s'\", "
+                "%s, %s)" % (source, name)))))
+
+    def emit_call(self, name, source, success, failures):
+        """Generate a call to a validating function."""
+        result = self.name('result')
+        return (
+            ['try:',
+             INDENT + '%s = %s(%s)' % (result, name, source),
+             'except NotValid as ex:'] +
+            _indented(failures('ex.errors')) +
+            ['else:'] +
+            _indented(success(result)))
+
+    def iterable_body(self, iterable):
+        """Generate the body of an iterable validator."""
+        item_name = self.name('item_validator')
+        original = self.constant(iterable, 'iterable')
+        item_body = []
+        for literal, run in itertools.groupby(iterable, key=_is_tag):
+            run = list(run)
+            if literal and len(run) > 1:
+                item_body.extend(self.emit_literals(run, 'value'))
+                continue
+
+            for sub_schema in run:
+                item_body.extend(
+                    self.emit(sub_schema, 'value', _return, _ignore, _ignore))
+        item_body.append(
+            "raise NotValid(Error("
+            "'%%(value)r invalidated by anything in %%(expected)s.', "
+            "value, %s))" % (original,))
+        self.functions.append(
+            ['def %s(value):' % (item_name,)] + _indented(item_body))
+        container = type(iterable)
+        container_name = self.constant(container, 'container')
+        if container is list:
+            result = '[%s(value) for value in data]' % (item_name,)
+        elif container is set:
+            result = '{%s(value) for value in data}' % (item_name,)
+        else:
+            result = '%s(%s(value) for value in data)' % (
+                container_name, item_name)
+        mismatch_name = self.constant(
+            _build_mismatch_validator(iterable), 'mismatch_validator')
+        return [
+            'if type(data) is not %s:' % (container_name,),
+            INDENT + 'return %s(data)' % (mismatch_name,),
+            'return %s' % (result,)]
+
+    def dict_body(self, dictionary):
+        """Generate the body of a dictionary validator."""
+        mandatory = []
+        optional = {}
+        defaults = []
+        types = []
+        for key, value in dictionary.items():
+            if isinstance(key, Optional):
+                optional[key.value] = value
+                if isinstance(value, BaseSchema) and \
+                        value.default is not UNSPECIFIED:
+                    defaults.append((key.value, value.default))
+                continue
+
+            if type(key) is type:
+                types.append((key, value))
+                continue
+
+            mandatory.append((key, value))
+        mandatory_keys = [key for key, _ in mandatory]
+        lines = [
+            'if not isinstance(data, dict):',
+            INDENT + "raise NotValid(Error("
+            "'%(value)r is not of type dict', data))",
+            'validated = {}',
+            'errors = []']
+        for key, value in mandatory:
+            lines.extend(self.mandatory_key(key, value))
+        lines.extend(
+            self.other_keys(
+                frozenset(mandatory_keys), optional, types))
+        lines.extend([
+            'if errors:',
+            INDENT + 'raise NotValid(*errors)'])
+        for key, default in defaults:
+            key_name = self.constant(key, 'key')
+            assign = 'validated[%s] = %s' % (
+                key_name, self.constant(default, 'default'))
+            if key in mandatory_keys:
+                lines.append(assign)
+            else:
+                lines.extend([
+                    'if %s not in data:' % (key_name,), INDENT + assign])
+        lines.append('return validated')
+        return lines
+
+    def spend(self):
+        """Generate code that stops once more than max_errors errors were
+        found."""
+        if self.max_errors is None:
+            return []
+
+        return [
+            'if len(errors) > %d:' % (self.max_errors,),
+            INDENT + 'raise NotValid(*truncated(errors, %d))' % (
+                self.max_errors,)]
+
+    def mandatory_key(self, key, value):
+        """Generate the validation of a mandatory key."""
+        key_name = self.constant(key, 'key')
+
+        def success(result):
+            return ['validated[%s] = %s' % (key_name, result)]
+
+        def failure(error):
+            return [
+                'errors.append(prefixed(%s, %s))' % (key_name, error)
+            ] + self.spend()
+
+        def failures(errors):
+            return [
+                'errors.extend([prefixed(%s, error) for error in %s])' % (
+                    key_name, errors)
+            ] + self.spend()
+
+        return (
+            ['if %s in data:' % (key_name,),
+             INDENT + 'value = data[%s]' % (key_name,)] +
+            _indented(
+                self.emit(value, 'value', success, failure, failures)) +
+            ['else:',
+             INDENT + "errors.append("
+             "Error('missing key: %%(expected)r', data, %s))" % (
+                 key_name,)] +
+            _indented(self.spend()))
+
+    def other_keys(self, mandatory_keys, optional, types):
+        """Generate the validation of all non-mandatory keys."""
+        lines = [
+            'for key in data:',
+            INDENT + 'if key in %s:' % (
+                self.constant(mandatory_keys, 'mandatory'),),
+            INDENT * 2 + 'continue',
+            INDENT + 'value = data[key]']
+        if optional:
+            optional_name = self.table('optional', optional, self.callee)
+            lines.extend(_indented(
+                ['if key in %s:' % (optional_name,)] +
+                _indented(
+                    self.emit_call(
+                        '%s[key]' % (optional_name,), 'value',
+                        lambda result: [
+                            'validated[key] = %s' % (result,)],
+                        lambda errors: [
+                            'errors.extend([prefixed(key, error) '
+                            'for error in %s])' % (errors,)] + self.spend())) +
+                [INDENT + 'continue']))
+        for key_type, value in types:
+            lines.extend(_indented(
+                ['if isinstance(key, %s):' % (
+                    self.constant(key_type, 'type'),)] +
+                _indented(self.emit(
+                    value, 'value',
+                    lambda result: [
+                        'validated[key] = %s' % (result,), 'continue'],
+                    _ignore, _ignore))))
+        lines.append(
+            INDENT + "errors.append("
+            "Error('%(value)r not matched', value, path=(key,)))")
+        lines.extend(_indented(self.spend()))
+        return lines
+
+    def source(self, definition):
+        """Generate the complete source for definition."""
+        self.function(definition)
+        return '\n\n'.join(
+            ['\n'.join(function) for function in self.functions] +
+            ['\n'.join(self.tables)]) + '\n'
+
+
+def compile_schema(definition, max_errors=None):
+    """Compile a val schema definition into a single validating function.
+
+    The result is a drop-in replacement for
+    `parse_schema(definition, max_errors)`: it returns the validated data or
+    raises the same NotValid errors.
+
+    """
+    compiler = _Compiler(max_errors)
+    source = compiler.source(definition)
+    namespace = compiler.namespace
+    exec(compile(source, FILENAME, 'exec'), namespace)
+    validator = namespace[compiler.function(definition)]
+    validator.source = source
+    return validator
@@ -0,0 +1,246 @@
+"""
+Constraint schemas: value ranges, lengths, patterns and sets of values.
+
+Unlike predicates passed as plain callables, constraints describe what they
+require with parameters (`Range(0, 1).maximum`), give readable errors
+without looking at docstrings, and can check whole arrays of values at
+once.
+
+Copyright (c) 2013-2015
+Eric Casteleijn, <thisfred@gmail.com>
+"""
+
+import array
+import re
+
+from val._val import (
+    BaseSchema, INVALID, NotValid, TAG_TYPES, _is_tag, _numpy_array)
+from val.exceptions import Error
+
+__all__ = ['Length', 'OneOf', 'Pattern', 'Range']
+
+
+class _Constraint(BaseSchema):
+
+    """Validates data without changing it."""
+
+    def _error(self, data):
+        """Return an Error if data is not valid, or None."""
+        raise NotImplementedError
+
+    def _validated(self, data):
+        error = self._error(data)
+        if error is not None:
+            raise NotValid(error)
+
+        return data
+
+    def _checked(self, data):
+        if self._error(data) is not None:
+            return INVALID
+
+        return data
+
+    def _is_pure(self):
+        return not self.additional_validators
+
+
+class Range(_Constraint):
+
+    """Validates values between a minimum and a maximum, inclusive.
+
+    Either bound can be None for no bound. Values that can not be compared
+    to the bounds are not valid.
+
+    """
+
+    def __init__(self, minimum=None, maximum=None, **kwargs):
+        super(Range, self).__init__(**kwargs)
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def _error(self, data):
+        try:
+            if self.minimum is not None and not data >= self.minimum:
+                return Error(
+                    '%(value)r is less than %(expected)r', data, self.minimum)
+
+            if self.maximum is not None and not data <= self.maximum:
+                return Error(
+                    '%(value)r is greater than %(expected)r', data,
+                    self.maximum)
+        except TypeError:
+            return Error(
+                '%(value)r can not be compared to %(expected)r', data,
+                self.minimum if self.minimum is not None else self.maximum)
+
+        return None
+
+    def _first_invalid(self, values):
+        """Check numpy arrays with vectorized comparisons, and arrays with
+        a single pass of min() and max()."""
+        if self.additional_validators:
+            return super(Range, self)._first_invalid(values)
+
+        numpy = _numpy_array(values)
+        if numpy is not None:
+            return self._first_invalid_numpy(numpy, values)
+
+        if isinstance(values, (array.array, memoryview)) and \
+                self._holds_for_all(values):
+            return None
+
+        return super(Range, self)._first_invalid(values)
+
+    def _holds_for_all(self, values):
+        """Determine whether all numbers in a buffer are in range."""
+        if not len(values):
+            return True
+
+        lowest, highest = min(values), max(values)
+        if isinstance(lowest, float):
+            # min() and max() can miss nan, but the sum can not.
+            total = sum(values)
+            if total != total:
+                return False
+
+        return self._error(lowest) is None and self._error(highest) is None
+
+    def _first_invalid_numpy(self, numpy, values):
+        """Find the first value out of range with vectorized comparisons."""
+        valid = numpy.ones(len(values), dtype=bool)
+        try:
+            if self.minimum is not None:
+                valid &= values >= self.minimum
+            if self.maximum is not None:
+                valid &= values <= self.maximum
+        except TypeError:
+            return super(Range, self)._first_invalid(values)
+
+        invalid = numpy.flatnonzero(~valid)
+        return int(invalid[0]) if len(invalid) else None
+
+    def __repr__(self):
+        return '<%s: %r to %r>' % (
+            self.__class__.__name__, self.minimum, self.maximum)
+
+
+class Length(_Constraint):
+
+    """Validates values with a length between a minimum and a maximum,
+    inclusive.
+
+    Either bound can be None for no bound.
+
+    """
+
+    def __init__(self, minimum=None, maximum=None, **kwargs):
+        super(Length, self).__init__(**kwargs)
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def _error(self, data):
+        try:
+            length = len(data)
+        except TypeError:
+            return Error('%(value)r has no length', data)
+
+        if self.minimum is not None and length < self.minimum:
+            return Error(
+                '%(value)r is shorter than %(expected)d', data, self.minimum)
+
+        if self.maximum is not None and length > self.maximum:
+            return Error(
+                '%(value)r is longer than %(expected)d', data, self.maximum)
+
+        return None
+
+    def __repr__(self):
+        return '<%s: %r to %r>' % (
+            self.__class__.__name__, self.minimum, self.maximum)
+
+
+# Whether compiled patterns have fullmatch(), which Python 2 does not.
+FULLMATCH = hasattr(re.compile(''), 'fullmatch')
+
+
+class Pattern(_Constraint):
+
+    """Validates strings that match a regular expression as a whole.
+
+    Takes a pattern string (and flags), or a compiled pattern.
+
+    """
+
+    def __init__(self, pattern, flags=0, **kwargs):
+        super(Pattern, self).__init__(**kwargs)
+        self.pattern = re.compile(pattern, flags)
+        self._whole = self.pattern
+        if not FULLMATCH:  # pragma: nocover
+            # Anchor the pattern at the end instead, flags can go anywhere
+            # in a pattern on Python 2.
+            source = self.pattern.pattern
+            if isinstance(source, bytes):
+                source = b'(?:' + source + b')\\Z'
+            else:
+                source = u'(?:' + source + u')\\Z'
+            self._whole = re.compile(source, self.pattern.flags)
+
+    def _error(self, data):
+        try:
+            if FULLMATCH:
+                matched = self._whole.fullmatch(data)
+            else:  # pragma: nocover
+                matched = self._whole.match(data)
+            if matched is not None:
+                return None
+        except TypeError:
+            pass
+
+        return Error(
+            '%(value)r does not match %(expected)r', data,
+            self.pattern.pattern)
+
+    def _accepts(self, data_type):
+        return issubclass(data_type, type(self.pattern.pattern))
+
+    def __repr__(self):
+        return '<%s: %r>' % (self.__class__.__name__, self.pattern.pattern)
+
+
+class OneOf(_Constraint):
+
+    """Validates values equal to any of the given values.
+
+    Strings, bytes, numbers, booleans and None are looked up in a set when
+    all values are of those types too.
+
+    """
+
+    def __init__(self, *values, **kwargs):
+        super(OneOf, self).__init__(**kwargs)
+        self.values = values
+        self._lookup = None
+        if all(_is_tag(value) for value in values):
+            self._lookup = frozenset(values)
+
+    def _error(self, data):
+        if self._lookup is not None and type(data) in TAG_TYPES:
+            if data in self._lookup:
+                return None
+        elif any(data == value for value in self.values):
+            return None
+
+        return Error('%(value)r is not one of %(expected)r', data, self.values)
+
+    def _first_invalid(self, values):
+        """Check arrays of numbers with a single set difference."""
+        if not self.additional_validators and self._lookup is not None and \
+                isinstance(values, (array.array, memoryview)) and \
+                not set(values) - self._lookup:
+            return None
+
+        return super(OneOf, self)._first_invalid(values)
+
+    def __repr__(self):
+        return '<%s: %r>' % (self.__class__.__name__, self.values)
@@ -0,0 +1,224 @@
+"""
+Optimize schema definitions.
+
+`optimize(definition)` rewrites a definition into one with fewer steps, that
+validates the same data to the same results:
+
+- `And` and `Or` nested directly in schemas of their own kind are
+  flattened, and so are `Schema` wrappers without options.
+- Alternatives of `Or`, and items of lists, tuples and sets, that can only
+  match data that an earlier alternative already matches are dropped, like
+  `bool` after `int`. So are steps of `And` that only accept what an
+  earlier step already did, like `int` after `bool`.
+- Types and literals move ahead of callables and other schemas that do not
+  change data, so that cheap checks rule data out first.
+
+Only data that is not valid can be treated differently: errors can be
+reported in another order, and callables no longer run for data that a
+type check already rules out. Callables are assumed to return the same
+result when called twice with the same data.
+
+Copyright (c) 2013-2015
+Eric Casteleijn, <thisfred@gmail.com>
+"""
+
+from collections import namedtuple
+
+from val._constraints import _Constraint
+from val._val import (
+    And, BaseSchema, Or, Ordered, Schema, UNSPECIFIED, _intern_key, _is_leaf)
+
+__all__ = ['optimize']
+
+Optimized = namedtuple('Optimized', ['definition', 'before', 'after'])
+
+
+def optimize(definition):
+    """Optimize a definition.
+
+    Return the optimized definition, and the number of nodes in the
+    definition before and after optimizing. Parts of the definition that
+    can not be improved are returned as they are.
+
+    """
+    optimized = _optimized(definition)
+    return Optimized(optimized, _count(definition), _count(optimized))
+
+
+def _count(definition):
+    """Count the nodes of a definition."""
+    if isinstance(definition, (Or, And)):
+        return 1 + sum(_count(value) for value in definition.values)
+
+    if isinstance(definition, Schema):
+        return 1 + _count(definition.definition)
+
+    if isinstance(definition, Ordered):
+        return 1 + sum(_count(value) for value in definition._definition)
+
+    if isinstance(definition, dict):
+        return 1 + sum(_count(value) for value in definition.values())
+
+    if type(definition) in (list, tuple, set):
+        return 1 + sum(_count(value) for value in definition)
+
+    return 1
+
+
+def _optimized(definition):
+    """Return an optimized definition."""
+    if type(definition) is Schema:
+        if _is_plain(definition) and not (
+                definition._compile or definition._cache_size or
+                definition._copy_on_write):
+            return _optimized(definition.definition)
+
+        return definition
+
+    if type(definition) is Or:
+        return _optimized_schema(definition, _alternatives)
+
+    if type(definition) is And:
+        return _optimized_schema(definition, _steps)
+
+    if isinstance(definition, dict):
+        values = dict(
+            (key, _optimized(value)) for key, value in definition.items())
+        if all(values[key] is definition[key] for key in definition):
+            return definition
+
+        return type(definition)(values)
+
+    if type(definition) in (list, tuple, set):
+        items = _alternatives([_optimized(item) for item in definition])
+        if len(items) == len(definition) and all(
+                item is original for item, original in zip(items, definition)):
+            return definition
+
+        return type(definition)(items)
+
+    return definition
+
+
+def _is_plain(schema, max_errors=None):
+    """Determine whether a schema only validates its definition."""
+    return (
+        not schema.additional_validators and schema.default is UNSPECIFIED and
+        not schema.annotations and schema.max_errors == max_errors)
+
+
+def _optimized_schema(schema, simplify):
+    """Return an optimized version of an Or or And schema."""
+    values = []
+    for value in schema.values:
+        value = _optimized(value)
+        if type(value) is type(schema) and _is_plain(
+                value, schema.max_errors) and _same_order(value, schema):
+            values.extend(value.values)
+        else:
+            values.append(value)
+    values = simplify(values)
+    if len(values) == 1 and _is_plain(schema):
+        return values[0]
+
+    if len(values) == len(schema.values) and all(
+            value is original
+            for value, original in zip(values, schema.values)):
+        return schema
+
+    options = dict(
+        additional_validators=list(schema.additional_validators),
+        default=schema.default, null_values=schema.null_values,
+        max_errors=schema.max_errors)
+    if type(schema) is Or:
+        options['adaptive'] = schema.adaptive
+    optimized = type(schema)(*values, **options)
+    optimized.annotations = dict(schema.annotations)
+    return optimized
+
+
+def _same_order(inner, outer):
+    """Determine whether alternatives are tried in the same order by both
+    schemas, which is not so when only one of them is adaptive."""
+    return getattr(inner, 'adaptive', False) == getattr(
+        outer, 'adaptive', False)
+
+
+def _keeps_data(definition):
+    """Determine whether a definition returns valid data as it is."""
+    if isinstance(definition, (Or, And)):
+        return definition.default is UNSPECIFIED and all(
+            _keeps_data(value) for value in definition.values)
+
+    if isinstance(definition, Schema):
+        return definition.default is UNSPECIFIED and _keeps_data(
+            definition.definition)
+
+    if isinstance(definition, _Constraint):
+        return definition.default is UNSPECIFIED
+
+    return not isinstance(definition, (BaseSchema, dict, list, tuple, set))
+
+
+def _accepts_all(wide, narrow):
+    """Determine whether wide accepts all data that narrow accepts."""
+    if type(wide) is type and type(narrow) is type:
+        return issubclass(narrow, wide)
+
+    key = _intern_key(wide)
+    return key is not None and key == _intern_key(narrow)
+
+
+def _alternatives(values):
+    """Drop alternatives that can not match, and move cheap ones first.
+
+    An alternative can not match when an earlier one accepts all of its
+    data, because the first match wins.
+
+    """
+    kept = []
+    for value in values:
+        if not any(_accepts_all(earlier, value) for earlier in kept):
+            kept.append(value)
+    return _cheap_first(kept)
+
+
+def _steps(values):
+    """Drop steps that can not fail, and move cheap ones first.
+
+    A step can not fail when it accepts all data that an earlier step does,
+    and neither changes data, nor does anything in between.
+
+    """
+    kept = []
+    unchanged = []
+    for value in values:
+        if not _keeps_data(value):
+            unchanged = []
+        elif any(_accepts_all(value, earlier) for earlier in unchanged):
+            continue
+        else:
+            unchanged.append(value)
+        kept.append(value)
+    return _cheap_first(kept)
+
+
+def _cheap_first(values):
+    """Move types and literals ahead of anything that does not change data.
+
+    Schemas that may change data stay where they are, and nothing moves
+    past them.
+
+    """
+    ordered = []
+    run = []
+    for value in values:
+        if _keeps_data(value):
+            run.append(value)
+            continue
+
+        ordered.extend(sorted(run, key=lambda item: not _is_leaf(item)))
+        ordered.append(value)
+        run = []
+    ordered.extend(sorted(run, key=lambda item: not _is_leaf(item)))
+    return ordered
@@ -0,0 +1,432 @@
+"""
+Profile validation per schema node.
+
+Inside `with profile() as stats:`, calling `validate()` on a schema builds a
+profiled copy of it the first time, with the same builders that build its
+own validators, and validates with that copy. Every validator that
+`parse_schema` builds for the copy is wrapped to count calls and failures
+and measure time. Nodes are named by their path in the definition, like
+`root['user']['tags'][*]`. Outside the block, schemas run their own
+validators untouched, so profiling costs nothing when it is not enabled.
+
+Only validators that actually run are measured: type checks that a list or
+`Or` does at once, or compiled schemas, show up as a single node.
+
+With `profile(memory=True)`, nodes also record the memory they allocate,
+measured with `tracemalloc`, which needs Python 3.9 or later.
+
+Copyright (c) 2013-2015
+Eric Casteleijn, <thisfred@gmail.com>
+"""
+
+import copy
+import threading
+from timeit import default_timer
+
+from val import _val
+from val._val import And, BaseSchema, Optional, Or, Ordered, Schema
+from val.exceptions import NotValid
+
+__all__ = ['profile']
+
+# Classes whose `validate()` is replaced while profiling.
+PATCHED = (BaseSchema, Schema)
+
+
+class Node(object):
+
+    """Statistics for a single node of a schema definition."""
+
+    __slots__ = (
+        'path', 'kind', 'calls', 'failures', 'total', 'own', 'allocated',
+        'own_allocated', 'peak')
+
+    def __init__(self, path, kind):
+        self.path = path
+        self.kind = kind
+        self.calls = 0
+        self.failures = 0
+        self.total = 0.0
+        self.own = 0.0
+        self.allocated = 0
+        self.own_allocated = 0
+        self.peak = 0
+
+    def __repr__(self):
+        return '<%s %s: %d calls>' % (
+            self.__class__.__name__, self.path, self.calls)
+
+
+class Profile(object):
+
+    """Statistics for all nodes of the schemas validated while profiling.
+
+    `nodes` maps paths to `Node`s. Each node has `calls`, `failures`, and
+    cumulative (`total`) and self (`own`) time in seconds.
+
+    When profiling memory, each node also has the bytes that were allocated
+    and not freed while it ran, including (`allocated`) and excluding
+    (`own_allocated`) its sub nodes, and the largest amount of memory in
+    use at any point while it ran (`peak`), in bytes above what was in use
+    when it started.
+
+    """
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self._tracemalloc = _import_tracemalloc() if memory else None
+        self.nodes = {}
+        self.stacks = {}
+        self.allocations = {}
+        self._roots = {}
+        self._copies = {}
+        self._local = threading.local()
+        self._patched = None
+        self._hook = None
+        self._tracing = False
+        self._overhead = 0
+
+    def __enter__(self):
+        if self.memory and not self._tracemalloc.is_tracing():
+            self._tracemalloc.start()
+            self._tracing = True
+        if self.memory:
+            self._calibrate()
+        self._patched = [(cls, cls.__dict__['validate']) for cls in PATCHED]
+        for cls, validate in self._patched:
+            cls.validate = self._patch(validate)
+        self._hook = _val._build_hook
+        _val._build_hook = self._built
+        return self
+
+    def __exit__(self, *exc_info):
+        _val._build_hook = self._hook
+        for cls, validate in self._patched:
+            cls.validate = validate
+        if self._tracing:
+            self._tracemalloc.stop()
+            self._tracing = False
+        return False
+
+    def _patch(self, validate):
+        """Make `validate()` use the profiled copy of a schema, unless the
+        schema is one."""
+        copies = self._copies
+        validator = self._validator
+
+        def profiled_validate(schema, data):
+            if id(schema) in copies:
+                return validate(schema, data)
+
+            return validator(schema)(data)
+
+        return profiled_validate
+
+    def _validator(self, schema):
+        """Get the profiled validator for a top level schema."""
+        root = self._roots.get(id(schema))
+        if root is None or root[0] is not schema:
+            path = 'root' if not self._roots else 'root#%d' % (
+                len(self._roots) + 1,)
+            root = self._roots[id(schema)] = (
+                schema,
+                self.timed(path, _kind(schema), self._build(schema, path)))
+        return root[1]
+
+    def _built(self, definition, max_errors):
+        """Build a profiled validator for a definition, if this thread is
+        building a profiled copy of a schema."""
+        building = self._frames('building')
+        if not building:
+            return None
+
+        parent = building[-1]
+        path = parent.child(definition)
+        if path is None:
+            # Not something the parent is known to be built from, so its
+            # time is measured as part of the parent.
+            return self._build(definition, None, max_errors)
+
+        path = parent.path + path
+        validator = self._build(definition, path, max_errors)
+        if path == parent.path:
+            return validator
+
+        return self.timed(path, _kind(definition), validator)
+
+    def _build(self, definition, path, max_errors=None):
+        """Build the validator for the node at path."""
+        building = self._frames('building')
+        building.append(_Building(path, definition))
+        try:
+            if isinstance(definition, BaseSchema):
+                return self._copy(definition).validate
+
+            return _val._build_validator(definition, max_errors)
+
+        finally:
+            building.pop()
+
+    def _copy(self, schema):
+        """Copy a schema, building its validators again."""
+        copied = copy.copy(schema)
+        self._copies[id(copied)] = copied
+        if isinstance(schema, Schema) and schema._cache is not None:
+            # Share the cache, so that what is cached stays the same.
+            copied._cache = schema._cache
+            copied._cache_lock = schema._cache_lock
+        return copied
+
+    def _frames(self, name='frames'):
+        """Get the stack of nodes being validated in this thread."""
+        frames = getattr(self._local, name, None)
+        if frames is None:
+            frames = []
+            setattr(self._local, name, frames)
+        return frames
+
+    def _node(self, path, kind):
+        node = self.nodes.get(path)
+        if node is None:
+            node = self.nodes[path] = Node(path, kind)
+        return node
+
+    def timed(self, path, kind, validator):
+        """Wrap validator to record statistics for the node at path."""
+        node = self._node(path, kind)
+        stacks = self.stacks
+
+        def timed_validator(data):
+            """Validate, and measure."""
+            frames = self._frames()
+            frames.append([node, 0.0])
+            start = default_timer()
+            try:
+                return validator(data)
+
+            except NotValid:
+                node.failures += 1
+                raise
+
+            finally:
+                elapsed = default_timer() - start
+                stack = tuple(frame[0].path for frame in frames)
+                children = frames.pop()[1]
+                if frames:
+                    frames[-1][1] += elapsed
+                node.calls += 1
+                node.total += elapsed
+                node.own += elapsed - children
+                stacks[stack] = stacks.get(stack, 0.0) + elapsed - children
+
+        if self.memory:
+            return self.traced(node, timed_validator)
+
+        return timed_validator
+
+    def _calibrate(self):
+        """Measure what tracing itself leaves allocated, per call."""
+        # Measure a node that does nothing, inside another one, like most
+        # nodes are.
+        probe = Node('', '')
+        inner = self.traced(probe, lambda data: data)
+        outer = self.traced(Node('', ''), inner)
+        overheads = []
+        for _ in range(5):
+            before = probe.allocated
+            outer(None)
+            overheads.append(probe.allocated - before)
+        self.allocations.clear()
+        self._overhead = min(overheads)
+
+    def traced(self, node, validator):
+        """Wrap validator to record the memory allocated by a node."""
+        allocations = self.allocations
+        tracemalloc = self._tracemalloc
+
+        def traced_validator(data):
+            """Validate, and trace memory allocations."""
+            frames = self._frames('memory_frames')
+            # A frame holds the node, the bytes allocated by sub nodes, and
+            # the memory in use at the start and at the highest point.
+            frame = [node, 0, 0, 0]
+            current, peak = tracemalloc.get_traced_memory()
+            if frames:
+                frames[-1][3] = max(frames[-1][3], peak)
+            tracemalloc.reset_peak()
+            frame[2] = frame[3] = current
+            frames.append(frame)
+            try:
+                return validator(data)
+
+            finally:
+                current, peak = tracemalloc.get_traced_memory()
+                stack = tuple(frame[0].path for frame in frames)
+                frames.pop()
+                allocated = current - frame[2] - self._overhead
+                highest = max(frame[3], peak)
+                if frames:
+                    frames[-1][1] += allocated
+                    frames[-1][3] = max(frames[-1][3], highest)
+                node.allocated += allocated
+                node.own_allocated += allocated - frame[1]
+                node.peak = max(node.peak, highest - frame[2])
+                allocations[stack] = (
+                    allocations.get(stack, 0) + allocated - frame[1])
+
+        return traced_validator
+
+    def table(self, nodes=None):
+        """Return the statistics as a table, slowest nodes first."""
+        if nodes is None:
+            nodes = sorted(self.nodes.values(), key=lambda node: -node.total)
+        header = '%-40s %-10s %8s %8s %12s %12s' % (
+            'path', 'kind', 'calls', 'failures', 'total (ms)', 'self (ms)')
+        if self.memory:
+            header += ' %12s %12s %12s' % ('alloc (KiB)', 'self (KiB)',
+                                           'peak (KiB)')
+        lines = [header]
+        for node in nodes:
+            line = '%-40s %-10s %8d %8d %12.3f %12.3f' % (
+                node.path, node.kind, node.calls, node.failures,
+                node.total * 1e3, node.own * 1e3)
+            if self.memory:
+                line += ' %12.1f %12.1f %12.1f' % (
+                    node.allocated / 1024.0, node.own_allocated / 1024.0,
+                    node.peak / 1024.0)
+            lines.append(line)
+        return '\n'.join(lines)
+
+    def top(self, limit=10):
+        """Return the nodes that allocated the most memory themselves."""
+        return sorted(
+            self.nodes.values(),
+            key=lambda node: (-node.own_allocated, -node.peak))[:limit]
+
+    def collapsed(self, memory=False):
+        """Return self time per stack in microseconds, for flamegraphs.
+
+        Pass `memory=True` for the bytes allocated per stack instead.
+
+        """
+        if memory:
+            weights = self.allocations.items()
+        else:
+            weights = (
+                (stack, round(elapsed * 1e6))
+                for stack, elapsed in self.stacks.items())
+        return '\n'.join(
+            '%s %d' % (';'.join(stack), weight)
+            for stack, weight in sorted(weights))
+
+
+def profile(memory=False):
+    """Profile validation per schema node, in a `with` block.
+
+    Profiling applies to `validate()` calls of all schemas in all threads,
+    while the block runs. Pass `memory=True` to also trace memory
+    allocations with `tracemalloc`, which makes validation a lot slower.
+    This raises RuntimeError on Pythons older than 3.9.
+
+    """
+    return Profile(memory=memory)
+
+
+def _import_tracemalloc():
+    """Import tracemalloc, or raise RuntimeError if it can not be used to
+    profile memory."""
+    try:
+        import tracemalloc
+    except ImportError:
+        tracemalloc = None
+    if not hasattr(tracemalloc, 'reset_peak'):
+        raise RuntimeError(
+            'profiling memory needs tracemalloc.reset_peak(), from Python '
+            '3.9 on')
+
+    return tracemalloc
+
+
+def _kind(definition):
+    """Describe the kind of a definition."""
+    if isinstance(definition, BaseSchema):
+        return definition.__class__.__name__
+
+    if type(definition) is type:
+        return 'type'
+
+    if isinstance(definition, dict):
+        return 'dict'
+
+    if type(definition) in (list, tuple, set):
+        return type(definition).__name__
+
+    if callable(definition):
+        return 'callable'
+
+    return 'literal'
+
+
+def _children(definition):
+    """Return the definitions that validators are built for when building
+    one for a definition, in order, with the paths of their nodes relative
+    to it.
+
+    An empty path means the node is measured as part of the definition.
+
+    """
+    if isinstance(definition, Schema):
+        return [(definition.definition, '')]
+
+    if isinstance(definition, (Or, And)):
+        return [
+            (value, '<%d>' % index)
+            for index, value in enumerate(definition.values)]
+
+    if isinstance(definition, Ordered):
+        return [
+            (value, '[%d]' % index)
+            for index, value in enumerate(definition._definition)]
+
+    if isinstance(definition, dict):
+        return [(value, _key_path(key)) for key, value in definition.items()]
+
+    if type(definition) in (list, tuple, set):
+        if len(definition) == 1:
+            return [(item, '[*]') for item in definition]
+
+        return [
+            (item, '[*]<%d>' % index) for index, item in enumerate(definition)]
+
+    return []
+
+
+def _key_path(key):
+    """Describe a dictionary key as part of a path."""
+    if isinstance(key, Optional):
+        key = key.value
+    if type(key) is type:
+        return '[%s]' % (key.__name__,)
+
+    return '[%r]' % (key,)
+
+
+class _Building(object):
+
+    """A definition that validators are being built for while profiling."""
+
+    def __init__(self, path, definition):
+        self.path = path
+        self.children = [] if path is None else _children(definition)
+        self.position = 0
+
+    def child(self, definition):
+        """Return the path of the node for a definition built next, or None
+        if it is not a known part of this one."""
+        for index in range(self.position, len(self.children)):
+            child, path = self.children[index]
+            if child is definition:
+                self.position = index + 1
+                return path
+
+        return None
@@ -0,0 +1,208 @@
+"""
+Columnar validation of tables of records.
+
+A table is a dictionary of equally long columns, or a list of dictionaries
+(rows) that is turned into columns once. Every column is validated against
+the value schema of its key in a single loop, instead of validating every
+row as a separate dictionary.
+
+Copyright (c) 2013-2015
+Eric Casteleijn, <thisfred@gmail.com>
+"""
+
+import itertools
+
+from val._val import (
+    _Sentinel, _build_type_dispatch, _determine_keys, parse_schema)
+from val.exceptions import Error, NotValid, prefixed, truncated
+
+__all__ = ['validate_table']
+
+OUTPUTS = ('rows', 'columns')
+# Marks the cells of keys that a row does not have.
+MISSING = _Sentinel('MISSING')
+
+
+def _record(definition):
+    """Find the dictionary definition of the records in a table."""
+    if isinstance(definition, dict):
+        return definition
+
+    if type(definition) in (list, tuple) and len(definition) == 1 and \
+            isinstance(definition[0], dict):
+        return definition[0]
+
+    raise TypeError(
+        'validate_table needs a dictionary schema, or a list or tuple schema '
+        'of one dictionary, not %r' % (definition,))
+
+
+def _columns(table):
+    """Return the columns of a table, and its number of rows."""
+    if isinstance(table, dict):
+        lengths = dict((key, len(column)) for key, column in table.items())
+        if len(set(lengths.values())) > 1:
+            raise NotValid(
+                Error('columns are not of equal length: %(value)r', lengths))
+
+        return table, max(lengths.values()) if lengths else 0
+
+    rows = list(table)
+    errors = [
+        Error('%(value)r is not of type dict', row, path=(index,))
+        for index, row in enumerate(rows) if not isinstance(row, dict)]
+    if errors:
+        raise NotValid(*errors)
+
+    columns = {}
+    for index, row in enumerate(rows):
+        for key, value in row.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = [MISSING] * len(rows)
+            column[index] = value
+    return columns, len(rows)
+
+
+def _type_key_validator(schemas):
+    """Build a validator for the values of a key that is matched by type."""
+
+    def type_key_validator(value):
+        """Validate a value with the first value schema that matches."""
+        for schema in schemas:
+            try:
+                return schema(value)
+            except NotValid:
+                continue
+
+        raise NotValid(Error('%(value)r not matched', value))
+
+    return type_key_validator
+
+
+class _Columns(object):
+
+    """Validates the columns of a table, collecting row indexed errors."""
+
+    def __init__(self, size, max_errors):
+        self.size = size
+        self.max_errors = max_errors
+        self.validated = {}
+        self.errors = []
+
+    def validate(self, key, validator, column, mandatory=False):
+        """Validate a column, whose missing cells are errors if mandatory."""
+        position = len(self.validated)
+        validated = self.validated[key] = []
+        append = validated.append
+        for row, value in enumerate(column):
+            if value is MISSING:
+                append(MISSING)
+                if not mandatory:
+                    continue
+
+                errors = [Error('missing key: %(expected)r', None, key)]
+            else:
+                try:
+                    append(validator(value))
+                    continue
+                except NotValid as ex:
+                    append(MISSING)
+                    errors = [prefixed(key, error) for error in ex.errors]
+            self.errors.extend(
+                (row, position, prefixed(row, error)) for error in errors)
+            if self.full():
+                break
+
+    def full(self):
+        """Determine whether more than max_errors errors were found."""
+        return self.max_errors is not None and \
+            len(self.errors) > self.max_errors
+
+    def default(self, key, default, overriding):
+        """Use default for cells without a value, or for all if overriding."""
+        column = self.validated.get(key)
+        if column is None or overriding:
+            self.validated[key] = [default] * self.size
+            return
+
+        self.validated[key] = [
+            default if value is MISSING else value for value in column]
+
+    def raise_errors(self):
+        """Raise NotValid with all errors, in row order, if there are any."""
+        if not self.errors:
+            return
+
+        self.errors.sort(key=lambda error: error[:2])
+        errors = [error for _, _, error in self.errors]
+        if self.max_errors is not None and len(errors) > self.max_errors:
+            errors = truncated(errors, self.max_errors)
+        raise NotValid(*errors)
+
+    def rows(self):
+        """Return the validated rows."""
+        keys = list(self.validated)
+        if not keys:
+            return [{} for _ in range(self.size)]
+
+        values = zip(*[self.validated[key] for key in keys])
+        if not any(self._has_missing(key) for key in keys):
+            return [dict(zip(keys, row)) for row in values]
+
+        return [
+            dict(
+                (key, value) for key, value in zip(keys, row)
+                if value is not MISSING)
+            for row in values]
+
+    def columns(self):
+        """Return the validated columns, with None for missing cells."""
+        return dict(
+            (key, [None if value is MISSING else value for value in column]
+             if self._has_missing(key) else column)
+            for key, column in self.validated.items())
+
+    def _has_missing(self, key):
+        return any(value is MISSING for value in self.validated[key])
+
+
+def validate_table(schema, table, output='rows'):
+    """Validate the records of a table column by column.
+
+    See `Schema.validate_table`.
+
+    """
+    if output not in OUTPUTS:
+        raise ValueError(
+            'output must be one of %s, not %r' % (', '.join(OUTPUTS), output))
+
+    max_errors = schema.max_errors
+    mandatory, optional, types, defaults = _determine_keys(
+        _record(schema.definition),
+        lambda value: parse_schema(value, max_errors))
+    columns, size = _columns(table)
+    result = _Columns(size, max_errors)
+    for key, validator in mandatory.items():
+        if result.full():
+            break
+
+        result.validate(
+            key, validator,
+            columns.get(key, itertools.repeat(MISSING, size)), mandatory=True)
+    dispatch = _build_type_dispatch(types)
+    for key, column in columns.items():
+        if key in mandatory:
+            continue
+
+        if result.full():
+            break
+
+        if key in optional:
+            result.validate(key, optional[key], column)
+        else:
+            result.validate(key, _type_key_validator(dispatch(key)), column)
+    result.raise_errors()
+    for key, (default, _) in defaults.items():
+        result.default(key, default, key in mandatory)
+    return result.rows() if output == 'rows' else result.columns()
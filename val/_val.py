@@ -5,21 +5,50 @@ Copyright (c) 2013-2015
 Eric Casteleijn, <thisfred@gmail.com>
 """
 
-from val.exceptions import NotValid
+import itertools
+import sys
+
+from val.exceptions import (
+    Alternatives, Error, NotValid, prefixed, truncated)
 
 __all__ = [
     'And', 'BaseSchema', 'Convert', 'Optional', 'Or', 'Ordered',
     'Schema', 'nullable', 'parse_schema']
 
-UNSPECIFIED = object()
 
+class _Sentinel(object):
+
+    """Unique marker value that stays unique when pickled."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+    def __reduce__(self):
+        return self.name
+
+
+def _info(name, fields, values):
+    """Return a named tuple of values.
 
-def _get_repr(thing):
-    """Get sensible string representation for validator."""
-    return (
-        getattr(thing, '__doc__') or
-        getattr(thing, '__name__') or
-        repr(thing))
+    The named tuple class is created when it is first used, so that
+    importing val does not import collections.
+
+    """
+    info_class = globals().get(name)
+    if info_class is None:
+        from collections import namedtuple
+        info_class = globals()[name] = namedtuple(name, fields)
+    return info_class(*values)
+
+
+UNSPECIFIED = _Sentinel('UNSPECIFIED')
+INVALID = _Sentinel('INVALID')
+ON_ERROR = ('raise', 'collect', 'skip')
+ON_ITEM_ERROR = ('raise', 'yield')
+CHUNKS_PER_WORKER = 4
 
 
 def _build_type_validator(value_type):
@@ -30,7 +59,8 @@ def _build_type_validator(value_type):
         if isinstance(data, value_type):
             return data
 
-        raise NotValid('%r is not of type %r' % (data, value_type))
+        raise NotValid(
+            Error('%(value)r is not of type %(expected)r', data, value_type))
 
     return type_validator
 
@@ -43,7 +73,8 @@ def _build_static_validator(exact_value):
         if data == exact_value:
             return data
 
-        raise NotValid('%r is not equal to %r' % (data, exact_value))
+        raise NotValid(
+            Error('%(value)r is not equal to %(expected)r', data, exact_value))
 
     return static_validator
 
@@ -60,155 +91,1043 @@ def _build_callable_validator(function):
         except (TypeError, ValueError, NotValid) as ex:
             raise NotValid(ex.args)
 
-        raise NotValid("%r invalidated by '%s'" % (data, _get_repr(function)))
+        raise NotValid(
+            Error(
+                "%(value)r invalidated by '%(description)s'", data,
+                function))
 
     return callable_validator
 
 
-def _build_iterable_validator(iterable):
-    """Build a validator from an iterable."""
-    sub_schemas = [parse_schema(s) for s in iterable]
+def _build_item_validator(iterable, max_errors=None):
+    """Build a validator for the items of an iterable.
+
+    Items of iterables of only types are checked with a single isinstance(),
+    and items of iterables of a single other definition with its validator,
+    without looking up candidates.
+
+    """
+    if iterable and all(type(item) is type for item in iterable):
+        return _build_types_item_validator(iterable)
+
+    if len(iterable) == 1:
+        return _build_single_item_validator(iterable, max_errors)
+
+    candidates = _build_dispatch(
+        iterable, _build_branches(iterable, max_errors))
 
     def item_validator(value):
         """Validate items in an iterable."""
-        for sub in sub_schemas:
+        for probe, sub in candidates(value):
+            if probe is not None:
+                validated = probe(value)
+                if validated is not INVALID:
+                    return validated
+
+                continue
+
             try:
                 return sub(value)
 
             except NotValid:
                 pass
 
-        raise NotValid('%r invalidated by anything in %s.' % (value, iterable))
+        raise NotValid(
+            Error(
+                '%(value)r invalidated by anything in %(expected)s.', value,
+                iterable))
+
+    return item_validator
+
+
+def _build_types_item_validator(iterable):
+    """Build a validator for items that must be of any of the types."""
+    types = tuple(iterable)
+
+    def types_item_validator(value):
+        """Validate items by their type."""
+        if isinstance(value, types):
+            return value
+
+        raise NotValid(
+            Error(
+                '%(value)r invalidated by anything in %(expected)s.', value,
+                iterable))
+
+    return types_item_validator
+
+
+def _build_single_item_validator(iterable, max_errors=None):
+    """Build a validator for items that must match a single definition."""
+    validator = parse_schema(next(iter(iterable)), max_errors)
+
+    def single_item_validator(value):
+        """Validate items with the only definition."""
+        try:
+            return validator(value)
+        except NotValid:
+            raise NotValid(
+                Error(
+                    '%(value)r invalidated by anything in %(expected)s.',
+                    value, iterable))
+
+    return single_item_validator
+
+
+def _build_iterable_validator(iterable, max_errors=None):
+    """Build a validator from an iterable."""
+    item_validator = _build_item_validator(iterable, max_errors)
+    mismatch_validator = _build_mismatch_validator(iterable)
 
     def iterable_validator(data):
         """Validate an iterable."""
         if not type(data) is type(iterable):
-            raise NotValid('%r is not of type %s' % (data, type(iterable)))
+            return mismatch_validator(data)
 
         return type(iterable)(item_validator(value) for value in data)
 
     return iterable_validator
 
 
-def _determine_keys(dictionary):
+def _build_mismatch_validator(iterable):
+    """Build a validator for data that is not of the type of an iterable
+    definition.
+
+    Buffers of numbers are validated as a whole for definitions that allow
+    it, all other data raises NotValid.
+
+    """
+    buffer_validator = _build_buffer_validator(iterable)
+
+    def mismatch_validator(data):
+        """Validate a buffer, or reject data of the wrong type."""
+        if buffer_validator is not None:
+            validated = buffer_validator(data)
+            if validated is not INVALID:
+                return validated
+
+        raise NotValid(
+            Error(
+                '%(value)r is not of type %(expected)s', data, type(iterable)))
+
+    return mismatch_validator
+
+
+# Formats of array.array and memoryview items, and kinds of numpy dtypes,
+# whose items are instances of each type.
+BUFFER_FORMATS = {int: frozenset('bBhHiIlLqQnN?'), float: frozenset('efd')}
+NUMPY_KINDS = {int: frozenset('biu'), float: frozenset('f')}
+
+
+def _buffer_item(iterable):
+    """Find what a list definition requires of the items of a buffer.
+
+    Returns the item type and the predicates for definitions like `[int]`,
+    `[float]` or `[And(float, predicate, ...)]`, or None for definitions
+    that buffers of numbers can not be validated against as they are.
+
+    """
+    if type(iterable) is not list or len(iterable) != 1:
+        return None
+
+    item = iterable[0]
+    if type(item) is type and item in BUFFER_FORMATS:
+        return item, ()
+
+    if type(item) is not And or item.additional_validators or \
+            item.default is not UNSPECIFIED or not item.values or \
+            type(item.values[0]) is not type or \
+            item.values[0] not in BUFFER_FORMATS:
+        return None
+
+    predicates = item.values[1:]
+    if not all(_keeps_numbers(predicate) for predicate in predicates):
+        return None
+
+    return item.values[0], predicates
+
+
+def _keeps_numbers(predicate):
+    """Determine whether a definition never changes the data it accepts."""
+    if isinstance(predicate, BaseSchema):
+        return predicate._is_pure() and predicate.default is UNSPECIFIED
+
+    if not callable(predicate):
+        return _is_pure(predicate)
+
+    return True
+
+
+def _buffer_has_items_of(data, item_type):
+    """Determine whether all items of a buffer are of item_type.
+
+    Returns None when data is not a one dimensional array.array,
+    memoryview or numpy array that can be read item by item.
+
+    """
+    if _is_array(data):
+        return data.typecode in BUFFER_FORMATS[item_type]
+
+    if isinstance(data, memoryview):
+        if data.ndim != 1 or len(data.format.lstrip('@')) != 1:
+            return None
+
+        return data.format.lstrip('@') in BUFFER_FORMATS[item_type]
+
+    numpy = _numpy_array(data)
+    if numpy is not None:
+        if data.ndim != 1:
+            return None
+
+        return data.dtype.kind in NUMPY_KINDS[item_type]
+
+    return None
+
+
+def _is_array(data):
+    """Determine whether data is an array.array.
+
+    Never imports array: data can only be an array if it already was.
+
+    """
+    array = sys.modules.get('array')
+    return array is not None and isinstance(data, array.array)
+
+
+def _numpy_array(data):
+    """Return the numpy module if data is a numpy array, or None.
+
+    Never imports numpy: data can only be a numpy array if it already was.
+
+    """
+    numpy = sys.modules.get('numpy')
+    if numpy is not None and isinstance(data, numpy.ndarray):
+        return numpy
+
+    return None
+
+
+def _items(values):
+    """Iterate over values, with the items of numpy arrays as Python
+    numbers."""
+    if _numpy_array(values) is not None:
+        return (value.item() for value in values)
+
+    return iter(values)
+
+
+def _first_invalid(checker, values):
+    """Return the index of the first value checker rejects, or None."""
+    for index, value in enumerate(_items(values)):
+        if checker(value) is INVALID:
+            return index
+
+    return None
+
+
+def _build_finder(predicate):
+    """Build a function that finds the first value predicate rejects."""
+    if isinstance(predicate, BaseSchema):
+        return predicate._first_invalid
+
+    checker = _parse_checker(predicate)
+    return lambda values: _first_invalid(checker, values)
+
+
+def _build_buffer_validator(iterable):
+    """Build a validator for buffers of numbers, or return None.
+
+    For list definitions like `[int]` and `[And(float, predicate)]`, a one
+    dimensional array.array, memoryview or numpy array (when numpy has been
+    imported) is valid when its items would be valid in a list. The type is
+    checked once for the whole buffer, every predicate is applied to the
+    whole buffer in turn (schemas like `Range` check it all at once), and
+    the buffer itself is returned. Other data gives INVALID.
+
+    """
+    found = _buffer_item(iterable)
+    if found is None:
+        return None
+
+    item_type, predicates = found
+    finders = [_build_finder(predicate) for predicate in predicates]
+
+    def buffer_validator(data):
+        """Validate a buffer of numbers without copying it."""
+        typed = _buffer_has_items_of(data, item_type)
+        if typed is None:
+            return INVALID
+
+        index = _first_invalid_item(data, typed, finders)
+        if index is not None:
+            value = data[index]
+            if _numpy_array(data) is not None:
+                value = value.item()
+            raise NotValid(
+                Error(
+                    '%(value)r invalidated by anything in %(expected)s.',
+                    value, iterable, path=(index,)))
+
+        return data
+
+    return buffer_validator
+
+
+def _first_invalid_item(data, typed, finders):
+    """Return the index of the first invalid item of a buffer, or None.
+
+    Every finder only looks at the items before the first one that an
+    earlier finder rejected, like `And` would for each item.
+
+    """
+    if not typed:
+        return 0 if len(data) else None
+
+    view = memoryview(data) if _is_array(data) else data
+    limit = len(view)
+    for find in finders:
+        index = find(view[:limit])
+        if index is not None:
+            limit = index
+    return limit if limit < len(view) else None
+
+
+def _determine_keys(dictionary, parse=None):
     """Determine the different kinds of keys."""
+    parse = parse or parse_schema
     optional = {}
     defaults = {}
     mandatory = {}
     types = {}
     for key, value in dictionary.items():
         if isinstance(key, Optional):
-            optional[key.value] = parse_schema(value)
+            optional[key.value] = parse(value)
             if isinstance(value, BaseSchema) and\
                     value.default is not UNSPECIFIED:
                 defaults[key.value] = (value.default, value.null_values)
             continue  # pragma: nocover
 
         if type(key) is type:
-            types[key] = parse_schema(value)
+            types[key] = parse(value)
             continue
 
-        mandatory[key] = parse_schema(value)
+        mandatory[key] = parse(value)
     return mandatory, optional, types, defaults
 
 
-def _validate_mandatory_keys(mandatory, validated, data, to_validate):
+def _build_type_dispatch(types):
+    """Build a function that returns the value schemas for a key.
+
+    These are the value schemas of all type keys the key is an instance of,
+    in order. They are looked up once for every class of key, unless the
+    class can lie about what it is an instance of.
+
+    """
+    items = tuple(types.items())
+    cache = {}
+
+    def dispatch(key):
+        """Return the value schemas for key, in order."""
+        key_class = type(key)
+        found = cache.get(key_class)
+        if found is None:
+            found = tuple(
+                value_schema for key_type, value_schema in items
+                if isinstance(key, key_type))
+            if not _overrides_class(key_class):
+                cache[key_class] = found
+        return found
+
+    return dispatch
+
+
+def _spend(errors, max_errors):
+    """Stop validating once there are more than max_errors errors, if
+    given."""
+    if max_errors is not None and len(errors) > max_errors:
+        raise NotValid(*truncated(errors, max_errors))
+
+
+def _validate_mandatory_keys(mandatory, validated, data, errors,
+                             max_errors=None):
     """Validate the manditory keys."""
-    errors = []
     for key, sub_schema in mandatory.items():
         if key not in data:
-            errors.append('missing key: %r' % (key,))
+            errors.append(Error('missing key: %(expected)r', data, key))
+            _spend(errors, max_errors)
             continue
         try:
             validated[key] = sub_schema(data[key])
         except NotValid as ex:
-            errors.extend(['%r: %s' % (key, arg) for arg in ex.args])
-        to_validate.remove(key)
-    return errors
+            errors.extend([prefixed(key, error) for error in ex.errors])
+            _spend(errors, max_errors)
 
 
-def _validate_optional_key(key, missing, value, validated, optional):
+def _validate_optional_key(key, value, validated, optional, errors):
     """Validate an optional key."""
     try:
         validated[key] = optional[key](value)
     except NotValid as ex:
-        return ['%r: %s' % (key, arg) for arg in ex.args]
-    if key in missing:
-        missing.remove(key)
-    return []
+        errors.extend([prefixed(key, error) for error in ex.errors])
 
 
-def _validate_type_key(key, value, types, validated):
-    """Validate a key's value by type."""
-    for key_schema, value_schema in types.items():
-        if not isinstance(key, key_schema):
-            continue
+def _validate_type_key(key, value, types, validated, errors):
+    """Validate a key's value by type, with a type dispatch function."""
+    for value_schema in types(key):
         try:
             validated[key] = value_schema(value)
         except NotValid:
             continue
         else:
-            return []
+            return
 
-    return ['%r: %r not matched' % (key, value)]
+    errors.append(Error('%(value)r not matched', value, path=(key,)))
 
 
-def _validate_other_keys(optional, types, missing, validated, data,
-                         to_validate):
+def _validate_other_keys(mandatory, optional, types, validated, data,
+                         errors, max_errors=None):
     """Validate the rest of the keys present in the data."""
-    errors = []
-    for key in to_validate:
-        value = data[key]
-        if key in optional:
-            errors.extend(
-                _validate_optional_key(
-                    key, missing, value, validated, optional))
+    for key, value in data.items():
+        if key in mandatory:
             continue
-        errors.extend(_validate_type_key(key, value, types, validated))
-    return errors
-
-
-def _build_dict_validator(dictionary):
-    """Build a validator from a dictionary."""
-    mandatory, optional, types, defaults = _determine_keys(dictionary)
+        if key in optional:
+            _validate_optional_key(key, value, validated, optional, errors)
+        else:
+            _validate_type_key(key, value, types, validated, errors)
+        if errors:
+            _spend(errors, max_errors)
+
+
+def _build_dict_validator(dictionary, max_errors=None):
+    """Build a validator from a dictionary.
+
+    Every key of the data is looked at exactly once, so validation takes
+    time linear in the number of keys. Validation stops after max_errors
+    errors, if given.
+
+    """
+    if max_errors is None:
+        keys = _determine_keys(dictionary)
+    else:
+        keys = _determine_keys(
+            dictionary, lambda value: parse_schema(value, max_errors))
+    return _build_keys_validator(*keys, max_errors=max_errors)
+
+
+def _build_keys_validator(mandatory, optional, types, defaults,
+                          max_errors=None):
+    """Build a dictionary validator from validators for its keys."""
+    types = _build_type_dispatch(types)
+    # Defaults for keys that are also mandatory always win, all others are
+    # only used when the key is missing from the data.
+    overriding = [
+        (key, default) for key, (default, _) in defaults.items()
+        if key in mandatory]
+    missing = [
+        (key, default) for key, (default, _) in defaults.items()
+        if key not in mandatory]
 
     def dict_validator(data):
         """Validate dictionaries."""
-        missing = list(defaults.keys())
         if not isinstance(data, dict):
-            raise NotValid('%r is not of type dict' % (data,))
+            raise NotValid(Error('%(value)r is not of type dict', data))
 
         validated = {}
-        to_validate = list(data.keys())
-        errors = _validate_mandatory_keys(
-            mandatory, validated, data, to_validate)
-        errors.extend(
-            _validate_other_keys(
-                optional, types, missing, validated, data, to_validate))
+        errors = []
+        _validate_mandatory_keys(
+            mandatory, validated, data, errors, max_errors)
+        _validate_other_keys(
+            mandatory, optional, types, validated, data, errors, max_errors)
         if errors:
             raise NotValid(*errors)
-        for key in missing:
-            validated[key] = defaults[key][0]
+        for key, default in missing:
+            if key not in data:
+                validated[key] = default
+        for key, default in overriding:
+            validated[key] = default
 
         return validated
 
     return dict_validator
 
 
-def parse_schema(schema):
-    """Parse a val schema definition."""
+def _build_type_checker(value_type):
+    """Build a checker that only checks the type of a value."""
+
+    def type_checker(data):
+        """Check instances of a particular type."""
+        if isinstance(data, value_type):
+            return data
+
+        return INVALID
+
+    return type_checker
+
+
+def _build_static_checker(exact_value):
+    """Build a checker that checks if the data is equal to an exact value."""
+
+    def static_checker(data):
+        """Check by equality."""
+        if data == exact_value:
+            return data
+
+        return INVALID
+
+    return static_checker
+
+
+def _build_callable_checker(function):
+    """Build a checker that checks the return value of function(data)."""
+
+    def callable_checker(data):
+        """Check the return value of function(data)."""
+        try:
+            if function(data):
+                return data
+
+        except (TypeError, ValueError, NotValid):
+            pass
+
+        return INVALID
+
+    return callable_checker
+
+
+def _build_iterable_checker(iterable):
+    """Build a checker from an iterable."""
+    sub_checkers = [_parse_checker(s) for s in iterable]
+    literal_checkers = _fold_literals(
+        zip(iterable, sub_checkers), lambda checker: checker)
+
+    def item_checker(value):
+        """Check items in an iterable."""
+        checkers = sub_checkers
+        if type(value) in TAG_TYPES:
+            checkers = literal_checkers
+        for sub in checkers:
+            checked = sub(value)
+            if checked is not INVALID:
+                return checked
+
+        return INVALID
+
+    buffer_validator = _build_buffer_validator(iterable)
+
+    def iterable_checker(data):
+        """Check an iterable, only copying it if an item was changed."""
+        if not type(data) is type(iterable):
+            return _check_buffer(buffer_validator, data)
+
+        checked = _check_items(item_checker, data)
+        if checked is INVALID:
+            return INVALID
+
+        if checked is None:
+            return data
+
+        return type(iterable)(checked)
+
+    return iterable_checker
+
+
+def _check_buffer(buffer_validator, data):
+    """Check a buffer of numbers, if the definition allows them."""
+    if buffer_validator is None:
+        return INVALID
+
+    try:
+        return buffer_validator(data)
+    except NotValid:
+        return INVALID
+
+
+def _check_items(item_checker, data):
+    """Check all items, return None if none changed, a list if any did."""
+    checked = None
+    for index, value in enumerate(data):
+        item = item_checker(value)
+        if item is INVALID:
+            return INVALID
+
+        if checked is None and item is not value:
+            checked = list(itertools.islice(data, index))
+        if checked is not None:
+            checked.append(item)
+    return checked
+
+
+def _check_type_key(key, value, types):
+    """Check a key's value by type, with a type dispatch function."""
+    for value_checker in types(key):
+        checked = value_checker(value)
+        if checked is not INVALID:
+            return checked
+
+    return INVALID
+
+
+def _check_keys(mandatory, optional, types, data):
+    """Check all keys, return a dictionary of changed values or INVALID."""
+    changed = None
+    for key, checker in mandatory.items():
+        if key not in data:
+            return INVALID
+
+        value = data[key]
+        checked = checker(value)
+        if checked is INVALID:
+            return INVALID
+
+        if checked is not value:
+            changed = changed or {}
+            changed[key] = checked
+    for key, value in data.items():
+        if key in mandatory:
+            continue
+        if key in optional:
+            checked = optional[key](value)
+        else:
+            checked = _check_type_key(key, value, types)
+        if checked is INVALID:
+            return INVALID
+
+        if checked is not value:
+            changed = changed or {}
+            changed[key] = checked
+    return changed
+
+
+def _build_dict_checker(dictionary):
+    """Build a checker from a dictionary."""
+    mandatory, optional, types, defaults = _determine_keys(
+        dictionary, parse=_parse_checker)
+    types = _build_type_dispatch(types)
+
+    def dict_checker(data):
+        """Check dictionaries, only copying them if a value was changed."""
+        if not isinstance(data, dict):
+            return INVALID
+
+        changed = _check_keys(mandatory, optional, types, data)
+        if changed is INVALID:
+            return INVALID
+
+        for key in defaults:
+            if key not in data or key in mandatory:
+                changed = changed or {}
+                changed[key] = defaults[key][0]
+        if not changed:
+            return data
+
+        checked = dict(data)
+        checked.update(changed)
+        return checked
+
+    return dict_checker
+
+
+def _parse_checker(schema):
+    """Parse a val schema definition into a checker.
+
+    Checkers return the validated data, or INVALID when the data is not
+    valid. They never raise NotValid, and only copy containers when their
+    content was changed.
+
+    """
+    if isinstance(schema, BaseSchema):
+        return schema._check
+
+    if type(schema) is type:
+        return _build_type_checker(schema)
+
+    if isinstance(schema, dict):
+        return _build_dict_checker(schema)
+
+    if type(schema) in (list, tuple, set):
+        return _build_iterable_checker(schema)
+
+    if callable(schema):
+        return _build_callable_checker(schema)
+
+    return _build_static_checker(schema)
+
+
+def _is_pure(schema):
+    """Determine whether a definition only contains types and literals."""
+    if isinstance(schema, BaseSchema):
+        return schema._is_pure()
+
+    if isinstance(schema, dict):
+        return all(_is_pure(value) for value in schema.values())
+
+    if type(schema) in (list, tuple, set):
+        return all(_is_pure(value) for value in schema)
+
+    return type(schema) is type or not callable(schema)
+
+
+def _is_leaf(schema):
+    """Determine whether a definition is a type or a literal."""
+    if type(schema) is type:
+        return True
+
+    return not (
+        callable(schema) or
+        isinstance(schema, (BaseSchema, dict, list, tuple, set)))
+
+
+def _build_probe(schema, validator):
+    """Build a function that cheaply rules out data for a definition.
+
+    Probes return the validated data or INVALID without raising. Only pure
+    definitions get a probe, so that checking before validating never runs
+    user code twice. Returns None for definitions that are not pure.
+
+    """
+    if not _is_pure(schema):
+        return None
+
+    checker = _parse_checker(schema)
+    if _is_leaf(schema):
+        return checker
+
+    def probe(data):
+        """Check the data before validating it."""
+        if checker(data) is INVALID:
+            return INVALID
+
+        return validator(data)
+
+    return probe
+
+
+def _build_branches(alternatives, max_errors=None):
+    """Build (probe, validator) pairs for a sequence of alternatives."""
+    branches = []
+    for alternative in alternatives:
+        validator = parse_schema(alternative, max_errors)
+        branches.append((_build_probe(alternative, validator), validator))
+    return tuple(branches)
+
+
+# Exact types whose instances can only compare equal to instances of types
+# in the same family.
+EQUALITY_FAMILIES = {
+    bool: int, int: int, float: int, complex: int, str: str, bytes: bytes,
+    type(None): type(None), list: list, tuple: tuple, dict: dict, set: set,
+    frozenset: set}
+
+
+def _may_accept(schema, data_type):
+    """Determine whether a definition can match data of a given type.
+
+    Returns False only when no instance of data_type can possibly be valid.
+
+    """
+    if isinstance(schema, BaseSchema):
+        return schema._accepts(data_type)
+
+    if type(schema) is type:
+        return issubclass(data_type, schema)
+
+    if isinstance(schema, dict):
+        return issubclass(data_type, dict)
+
+    if type(schema) in (list, tuple, set):
+        return data_type is type(schema)
+
+    if callable(schema):
+        return True
+
+    family = EQUALITY_FAMILIES.get(type(schema))
+    data_family = EQUALITY_FAMILIES.get(data_type)
+    return family is None or data_family is None or family is data_family
+
+
+def _overrides_class(data_type):
+    """Determine whether instances of a type can lie about their class."""
+    return any(
+        '__class__' in vars(base) for base in data_type.__mro__
+        if base is not object)
+
+
+# Types of literal values that can tell alternatives apart through a hash
+# lookup, because they hash alike exactly when they are equal.
+TAG_TYPES = frozenset([str, bytes, int, bool, float, type(None)])
+
+
+def _is_tag(value):
+    """Determine whether a literal can be looked up as a tag."""
+    return type(value) in TAG_TYPES and value == value
+
+
+def _build_membership(values):
+    """Build a checker that looks data up in a set of literal values."""
+    values = frozenset(values)
+
+    def membership_checker(data):
+        """Check whether data is equal to any of the values."""
+        if data in values:
+            return data
+
+        return INVALID
+
+    return membership_checker
+
+
+def _fold_literals(pairs, fold):
+    """Merge runs of literals among (definition, item) pairs.
+
+    Returns the items in order, with every run of two or more literals that
+    can be looked up as tags replaced by fold(checker), where checker is a
+    single membership test for the whole run. Only data whose exact type is
+    in TAG_TYPES can be checked that way, since instances of other types can
+    be equal to a literal without hashing alike.
+
+    """
+    items = []
+    for literal, run in itertools.groupby(
+            pairs, key=lambda pair: _is_tag(pair[0])):
+        run = list(run)
+        if literal and len(run) > 1:
+            items.append(fold(_build_membership(value for value, _ in run)))
+            continue
+
+        items.extend(item for _, item in run)
+    return tuple(items)
+
+
+def _build_dispatch(alternatives, branches):
+    """Build a function that returns the branches that may match data.
+
+    The branches for every type of data are computed once and cached, so
+    alternatives that can never match data of that type are not tried, and
+    runs of literals are looked up by hash when the data is a literal too.
+
+    """
+    cache = {}
+
+    def candidates(data):
+        """Return the branches that may match data, in order."""
+        data_type = type(data)
+        found = cache.get(data_type)
+        if found is None:
+            if _overrides_class(data_type):
+                found = branches
+            else:
+                found = [
+                    (schema, branch)
+                    for schema, branch in zip(alternatives, branches)
+                    if _may_accept(schema, data_type)]
+                if data_type in TAG_TYPES:
+                    found = _fold_literals(
+                        found, lambda checker: (checker, None))
+                else:
+                    found = tuple(branch for _, branch in found)
+            cache[data_type] = found
+        return found
+
+    return candidates
+
+
+# Validators shared by structurally equal definitions, for as long as any
+# schema uses them. Created when the first one is, so that importing val
+# does not import weakref.
+_INTERNED = None
+
+
+def _intern_key(schema):
+    """Build a key that is equal for definitions that validate alike.
+
+    Return None for definitions that can not be compared structurally.
+
+    """
+    if isinstance(schema, BaseSchema) or (
+            callable(schema) and type(schema).__eq__ is object.__eq__):
+        return ('object', schema)
+
+    if isinstance(schema, dict):
+        items = tuple(
+            (_intern_key(key), _intern_key(value))
+            for key, value in schema.items())
+        if any(None in item for item in items):
+            return None
+        return ('dict', items)
+
+    if isinstance(schema, Optional):
+        key = _intern_key(schema.value)
+        return None if key is None else ('optional', key)
+
+    if type(schema) in (list, tuple, set):
+        items = tuple(_intern_key(item) for item in schema)
+        return None if None in items else (type(schema), 'items', items)
+
+    if callable(schema):
+        return None
+
+    return _cache_key(schema)
+
+
+def _find_tag(alternatives):
+    """Find a key that all dictionary alternatives have a literal value for.
+
+    Return the key, a dictionary from values of that key to the positions of
+    the alternatives that require it, and the positions of all other
+    alternatives. Return None if there are fewer than two dictionaries, or
+    no such key.
+
+    """
+    dictionaries = [
+        alternative for alternative in alternatives
+        if isinstance(alternative, dict)]
+    if len(dictionaries) < 2:
+        return None
+
+    for key in dictionaries[0]:
+        if isinstance(key, Optional) or type(key) is type:
+            continue
+
+        if all(key in dictionary and _is_tag(dictionary[key])
+               for dictionary in dictionaries):
+            return _build_tags(alternatives, key)
+
+    return None
+
+
+def _build_tags(alternatives, key):
+    """Index the positions of alternatives by their value for key."""
+    others = [
+        position for position, alternative in enumerate(alternatives)
+        if not isinstance(alternative, dict)]
+    tags = {}
+    for position, alternative in enumerate(alternatives):
+        if isinstance(alternative, dict):
+            tags.setdefault(alternative[key], list(others)).append(position)
+    index = dict(
+        (tag, tuple(sorted(positions))) for tag, positions in tags.items())
+    return key, index, tuple(others)
+
+
+# Exact types of containers that an adaptive Or tries its alternatives for
+# in order of hits. Other data is already looked up by type and value.
+ADAPTIVE_TYPES = frozenset([dict, list, tuple, set, frozenset])
+# Number of matches after which an adaptive Or orders its alternatives again.
+REORDER_EVERY = 1000
+
+
+def _tag_values(schema):
+    """Find the literal values that a definition requires keys to have."""
+    if isinstance(schema, Schema):
+        return _tag_values(schema.definition)
+
+    if isinstance(schema, And):
+        return _tag_values(schema.values[0]) if schema.values else {}
+
+    if not isinstance(schema, dict):
+        return {}
+
+    return dict(
+        (key, value) for key, value in schema.items()
+        if _is_tag(value) and not isinstance(key, Optional) and
+        type(key) is not type)
+
+
+def _disjoint(first, second):
+    """Prove that no container of an exact built in type matches both
+    definitions.
+
+    Return the dictionary keys that the proof needs to have literal values
+    in the data, or None if there is no proof.
+
+    """
+    shared = [
+        data_type for data_type in ADAPTIVE_TYPES
+        if _may_accept(first, data_type) and _may_accept(second, data_type)]
+    if not shared:
+        return ()
+
+    if shared != [dict]:
+        return None
+
+    tags, others = _tag_values(first), _tag_values(second)
+    for key, value in tags.items():
+        if key in others and others[key] != value:
+            return (key,)
+
+    return None
+
+
+def _build_proof(alternatives):
+    """Prove that no two alternatives match the same container.
+
+    Return the dictionary keys that the proof needs to have literal values
+    in the data, or None if there is no proof.
+
+    """
+    keys = set()
+    for first, second in itertools.combinations(alternatives, 2):
+        found = _disjoint(first, second)
+        if found is None:
+            return None
+
+        keys.update(found)
+    return tuple(keys)
+
+
+# Called with every definition and max_errors before a validator is built
+# for it, while profiling. Returns the validator to use, or None to build
+# one as usual.
+_build_hook = None
+
+
+def parse_schema(schema, max_errors=None):
+    """Parse a val schema definition.
+
+    Structurally equal definitions share a single validator. Dictionaries
+    stop validating after max_errors errors, if given.
+
+    """
+    if _build_hook is not None:
+        validator = _build_hook(schema, max_errors)
+        if validator is not None:
+            return validator
 
     if isinstance(schema, BaseSchema):
         return schema.validate
 
+    key = _intern_key(schema)
+    if key is None:
+        return _build_validator(schema, max_errors)
+
+    global _INTERNED
+    if _INTERNED is None:
+        import weakref
+        _INTERNED = weakref.WeakValueDictionary()
+    if max_errors is not None:
+        key = ('max_errors', max_errors, key)
+    try:
+        validator = _INTERNED.get(key)
+    except TypeError:
+        # Something in the definition, like a schema that defines __eq__
+        # without __hash__, can not be hashed.
+        return _build_validator(schema, max_errors)
+
+    if validator is None:
+        validator = _INTERNED[key] = _build_validator(schema, max_errors)
+    return validator
+
+
+def _build_validator(schema, max_errors=None):
+    """Build a validator for a val schema definition."""
     if type(schema) is type:
         return _build_type_validator(schema)
 
     if isinstance(schema, dict):
-        return _build_dict_validator(schema)
+        return _build_dict_validator(schema, max_errors)
 
     if type(schema) in (list, tuple, set):
-        return _build_iterable_validator(schema)
+        return _build_iterable_validator(schema, max_errors)
 
     if callable(schema):
         return _build_callable_validator(schema)
@@ -216,42 +1135,111 @@ def parse_schema(schema):
     return _build_static_validator(schema)
 
 
+# Whether BaseSchema subclasses implement `validate()` instead of
+# `_validated()`, by class.
+_VALIDATES_ITSELF = {}
+
+
+def _validates_itself(schema_class):
+    """Determine whether a BaseSchema subclass overrides `validate()` but not
+    `_validated()`."""
+    found = _VALIDATES_ITSELF.get(schema_class)
+    if found is None:
+        bases = schema_class.__mro__
+        found = _VALIDATES_ITSELF[schema_class] = not any(
+            '_validated' in vars(base)
+            for base in bases[:bases.index(BaseSchema)])
+    return found
+
+
 class BaseSchema(object):
 
     """Base class for all Schema objects."""
 
+    # Attributes built from the definition, that are left out when pickling
+    # and built again by `_build()` (or on demand) when unpickling.
+    _built = ('_async_validator',)
+
     def __init__(self, additional_validators=None, default=UNSPECIFIED,
-                 null_values=UNSPECIFIED):
+                 null_values=UNSPECIFIED, max_errors=None):
         """Fallback constructor."""
         self.additional_validators = additional_validators or []
         self.default = default
         self.null_values = null_values
+        self.max_errors = max_errors
         self.annotations = {}
 
+    def _build(self):
+        """Build validators from the definition."""
+        pass
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self._built:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build()
+
     def validates(self, data):
         """Return True if schema validates data, False otherwise."""
-        try:
-            self.validate(data)
-            return True
-        except NotValid:
-            return False
+        return self._check(data) is not INVALID
 
     def _validated(self, data):
         """Return validated data."""
         raise NotImplementedError
 
-    def validate(self, data):
-        """Validate data. Raise NotValid error for invalid data."""
-        validated = self._validated(data)
-        errors = []
+    def _checked(self, data):
+        """Return validated data, or INVALID if the data is not valid.
+
+        Subclasses should override this with an implementation that does
+        not raise NotValid. Subclasses that only override `validate()` are
+        checked with it.
+
+        """
+        try:
+            if _validates_itself(type(self)):
+                return self.validate(data)
+
+            return self._validated(data)
+        except NotValid:
+            return INVALID
+
+    def _is_pure(self):
+        """Determine whether validation runs nothing but type checks and
+        comparisons."""
+        return False
+
+    def _accepts(self, data_type):
+        """Determine whether data of a given type can possibly be valid."""
+        return True
+
+    def _first_invalid(self, values):
+        """Return the index of the first of values that is not valid, or None.
+
+        Values can be any sequence, including array.array, memoryview and
+        numpy arrays. Subclasses can override this to check all values at
+        once.
+
+        """
+        return _first_invalid(self._check, values)
+
+    def _check(self, data):
+        """Check data. Return INVALID for invalid data, never raise."""
+        checked = self._checked(data)
+        if checked is INVALID or _validates_itself(type(self)):
+            return checked
+
         for validator in self.additional_validators:
-            if not validator(validated):
-                errors.append(
-                    "%s invalidated by '%s'" % (
-                        validated, _get_repr(validator)))
-        if errors:
-            raise NotValid(*errors)
+            if not validator(checked):
+                return INVALID
+
+        return self._defaulted(checked)
 
+    def _defaulted(self, validated):
+        """Substitute the default value for null values."""
         if self.default is UNSPECIFIED:
             return validated
 
@@ -264,19 +1252,246 @@ class BaseSchema(object):
 
         return validated
 
+    def validate(self, data):
+        """Validate data. Raise NotValid error for invalid data."""
+        validated = self._validated(data)
+        errors = []
+        for validator in self.additional_validators:
+            if not validator(validated):
+                errors.append(
+                    Error(
+                        "%(value)s invalidated by '%(description)s'",
+                        validated, validator))
+        if errors:
+            raise NotValid(*errors)
+
+        return self._defaulted(validated)
+
+    def validate_async(self, data, concurrency=None):
+        """Validate data with a schema that may contain coroutine validators.
+
+        Return an awaitable for the validated data, that raises NotValid
+        for invalid data. Callables, converters and additional validators
+        can be `async def` functions anywhere in the definition. Values of
+        dictionary keys and list items are validated concurrently, with at
+        most `concurrency` awaitables in flight, if given.
+
+        """
+        from val._async import validate_async
+        return validate_async(self, data, concurrency=concurrency)
+
+    def _validator(self):
+        """Return the function that validates data for this schema."""
+        return self.validate
+
+    def validate_many(self, iterable, on_error='raise', workers=None):
+        """Validate every item in iterable.
+
+        Return a list of validated items and a list of (index, NotValid)
+        pairs for the items that are not valid. With `on_error='raise'` (the
+        default) the first NotValid error is raised, with `'collect'` all
+        errors are returned, and with `'skip'` invalid items are left out
+        and no errors are returned.
+
+        Pass `workers` to split the items into chunks that are validated in
+        that many worker processes. This needs the schema, and the items, to
+        be picklable, so definitions can not contain lambdas or local
+        functions.
+
+        """
+        if on_error not in ON_ERROR:
+            raise ValueError(
+                'on_error must be one of %s, not %r' % (
+                    ', '.join(ON_ERROR), on_error))
+
+        if workers:
+            return self._validate_parallel(iterable, on_error, workers)
+
+        validate = self._validator()
+        if on_error == 'raise':
+            return [validate(item) for item in iterable], []
+
+        validated = []
+        errors = []
+        append = validated.append
+        for index, item in enumerate(iterable):
+            try:
+                append(validate(item))
+            except NotValid as ex:
+                if on_error == 'collect':
+                    errors.append((index, ex))
+        return validated, errors
+
+    def _validate_parallel(self, iterable, on_error, workers):
+        """Validate chunks of items in worker processes."""
+        from concurrent.futures import ProcessPoolExecutor
+
+        items = list(iterable)
+        size = max(1, -(-len(items) // (workers * CHUNKS_PER_WORKER)))
+        starts = range(0, len(items), size)
+        validated = []
+        errors = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                _validate_chunk, itertools.repeat(self),
+                [items[start:start + size] for start in starts],
+                itertools.repeat(on_error))
+            for start, (chunk, chunk_errors) in zip(starts, results):
+                validated.extend(chunk)
+                errors.extend(
+                    (start + index, error) for index, error in chunk_errors)
+        return validated, errors
+
+
+# Exact types whose instances are immutable, and equal only if they are
+# interchangeable for validation.
+CACHEABLE_TYPES = frozenset([str, bytes, int, bool, type(None)])
+
+
+def _cache_key(data):
+    """Build a key for caching the validation of data.
+
+    Return None if data can not be cached, because it is (or contains)
+    something other than strings, numbers, booleans, None, tuples and
+    frozensets.
+
+    """
+    data_type = type(data)
+    if data_type in CACHEABLE_TYPES:
+        return (data_type, data)
+
+    if data_type is float:
+        return (float, data.hex())
+
+    if data_type is tuple or data_type is frozenset:
+        keys = data_type(_cache_key(item) for item in data)
+        if None in keys:
+            return None
+        return (data_type, keys)
+
+    return None
+
+
+def _converts(schema):
+    """Determine whether a definition may convert data."""
+    if isinstance(schema, Schema):
+        return _converts(schema.definition)
+
+    if isinstance(schema, (Or, And)):
+        return any(_converts(value) for value in schema.values)
+
+    if isinstance(schema, Ordered):
+        return any(_converts(sub) for sub in schema.schemas)
+
+    if isinstance(schema, BaseSchema):
+        return not schema._is_pure()
+
+    if isinstance(schema, dict):
+        return any(_converts(value) for value in schema.values())
+
+    if type(schema) in (list, tuple, set):
+        return any(_converts(value) for value in schema)
+
+    return False
+
 
 class Schema(BaseSchema):
 
-    """A val schema."""
+    """A val schema.
 
-    def __init__(self, schema, **kwargs):
+    Pass `compile=True` to generate a single specialized Python function for
+    the definition instead of a tree of closures. Both behave the same.
+
+    Pass `cache_size` to remember the results of validating up to that many
+    different immutable values (strings, numbers, booleans, None, and tuples
+    and frozensets of those), evicting the least recently used. Other data
+    is never cached, and neither are results that could be changed by the
+    caller, or schemas that contain Convert (or other schemas that may
+    convert data). Use `cache_info()` to see how well the cache works.
+
+    Pass `lazy=True` to put off building validators until the schema is
+    first used, which is safe to do from several threads at once.
+
+    Pass `copy_on_write=True` to get the data itself back from `validate()`,
+    instead of a validated copy, unless something in it had to change. Only
+    dictionaries, lists, tuples and sets that contain changed values (or
+    dictionaries that get default values) are copied, everything else is
+    shared with the data. Converters run twice for data that is not valid.
+
+    Pass `max_errors` to stop validating dictionaries once more than that
+    many errors were found (`1` stops at the second error). Only the first
+    `max_errors` errors are raised, followed by one that says the rest were
+    truncated. Lists, tuples, sets, `Ordered` and `And`
+    already stop at their first error. Other schemas in the definition use
+    their own `max_errors`.
+
+    Pass `optimize=True` to flatten nested `And` and `Or` schemas, drop
+    alternatives that can never match and move type checks ahead of
+    callables before building validators (see `val.optimize`). The
+    `definition` of the schema is then the optimized one, and `optimized`
+    has the number of nodes before and after.
+
+    """
+
+    _built = BaseSchema._built + (
+        'schema', '_checker', '_item_validator', '_cache', '_cache_lock',
+        '_cache_hits', '_cache_misses', '_build_lock')
+
+    def __init__(self, schema, compile=False, cache_size=None, lazy=False,
+                 copy_on_write=False, optimize=False, **kwargs):
         super(Schema, self).__init__(**kwargs)
+        self.optimized = None
+        if optimize:
+            from val._optimizer import optimize as optimize_definition
+            self.optimized = optimize_definition(schema)
+            schema = self.optimized.definition
         self._definition = schema
-        self.schema = parse_schema(schema)
+        self._compile = compile
+        self._cache_size = cache_size
+        self._copy_on_write = copy_on_write
+        if lazy:
+            import threading
+            self._build_lock = threading.Lock()
+        else:
+            self._build()
+
+    def __getattr__(self, name):
+        # Only called for missing attributes, so this costs nothing once the
+        # validators of a lazy schema are built.
+        lock = self.__dict__.get('_build_lock')
+        if lock is None or name not in self._built:
+            raise AttributeError(
+                "'%s' object has no attribute '%s'" % (
+                    self.__class__.__name__, name))
+
+        with lock:
+            if '_build_lock' in self.__dict__:
+                self._build()
+                del self._build_lock
+        return object.__getattribute__(self, name)
+
+    def _build(self):
+        self._checker = None
+        self._item_validator = None
+        self._cache = None
+        self._cache_hits = self._cache_misses = 0
+        if self._cache_size and not _converts(self._definition):
+            # Only imported for schemas with a cache, to keep importing val
+            # fast.
+            import threading
+            from collections import OrderedDict
+            self._cache = OrderedDict()
+            self._cache_lock = threading.Lock()
+        if self._compile:
+            from val._compiler import compile_schema
+            self.schema = compile_schema(self._definition, self.max_errors)
+        else:
+            self.schema = parse_schema(self._definition, self.max_errors)
 
     @property
     def definition(self):
-        """Definition with which this schema was initialized."""
+        """Definition with which this schema was initialized, or its
+        optimized version."""
         return self._definition
 
     def __repr__(self):
@@ -285,6 +1500,172 @@ class Schema(BaseSchema):
     def _validated(self, data):
         return self.schema(data)
 
+    def _validator(self):
+        if self._cache is not None or self._copy_on_write or \
+                self.additional_validators or self.default is not UNSPECIFIED:
+            return self.validate
+
+        return self.schema
+
+    def validate(self, data):
+        if self._cache is None:
+            return self._validate(data)
+
+        key = _cache_key(data)
+        if key is None:
+            return self._validate(data)
+
+        cached = self._cached(key)
+        if cached is None:
+            cached = self._remember(key, data)
+        validated, errors = cached
+        if errors:
+            raise NotValid(*errors)
+
+        return validated
+
+    def _validate(self, data):
+        """Validate data, without looking at the cache."""
+        if self._copy_on_write:
+            # The check engine only copies what changed, fall back on the
+            # validators for the errors.
+            checked = super(Schema, self)._check(data)
+            if checked is not INVALID:
+                return checked
+
+        return super(Schema, self).validate(data)
+
+    def _check(self, data):
+        if self._cache is not None:
+            key = _cache_key(data)
+            cached = None if key is None else self._cached(key)
+            if cached is not None:
+                return INVALID if cached[1] else cached[0]
+
+        return super(Schema, self)._check(data)
+
+    def _cached(self, key):
+        """Look up a cached (validated, errors) pair, or return None."""
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is None:
+                self._cache_misses += 1
+                return None
+
+            self._cache_hits += 1
+            # Move the key to the end, Python 2 has no move_to_end().
+            self._cache[key] = self._cache.pop(key)
+            return cached
+
+    def _remember(self, key, data):
+        """Validate data, and cache the outcome if possible."""
+        try:
+            cached = (self._validate(data), ())
+        except NotValid as ex:
+            cached = (None, ex.errors)
+        else:
+            if _cache_key(cached[0]) is None:
+                return cached
+
+        with self._cache_lock:
+            self._cache[key] = cached
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return cached
+
+    def cache_info(self):
+        """Return the hits, misses, maximum and current size of the cache."""
+        return _info('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'], (
+            self._cache_hits, self._cache_misses, self._cache_size,
+            len(self._cache or ())))
+
+    def cache_clear(self):
+        """Clear the cache and its statistics."""
+        if self._cache is not None:
+            with self._cache_lock:
+                self._cache.clear()
+                self._cache_hits = self._cache_misses = 0
+
+    def iter_validate(self, iterable, on_error='raise'):
+        """Validate the items of iterable one at a time, as they are consumed.
+
+        Only works for list, tuple and set schemas, and accepts any iterable,
+        including generators, regardless of the type of the schema. Yields
+        validated items without building a validated container, so the
+        additional validators and default of the schema itself are not used.
+
+        Errors are prefixed with the index of the item. With
+        `on_error='raise'` (the default) the first NotValid error is raised,
+        with `'yield'` the NotValid error is yielded in place of the invalid
+        item.
+
+        """
+        if type(self._definition) not in (list, tuple, set):
+            raise TypeError(
+                'iter_validate needs a list, tuple or set schema, not %r' % (
+                    self._definition,))
+
+        if on_error not in ON_ITEM_ERROR:
+            raise ValueError(
+                'on_error must be one of %s, not %r' % (
+                    ', '.join(ON_ITEM_ERROR), on_error))
+
+        if self._item_validator is None:
+            self._item_validator = _build_item_validator(
+                self._definition, self.max_errors)
+        return _iter_validated(
+            self._item_validator, iterable, on_error == 'raise')
+
+    def validate_table(self, table, output='rows'):
+        """Validate a table of records column by column.
+
+        Works for dictionary schemas, and list or tuple schemas of one
+        dictionary. The table is a dictionary of equally long columns, or
+        an iterable of dictionaries (rows). Every column is validated
+        against the value schema of its key in one loop, and missing keys
+        and defaults are handled per column. The additional validators and
+        default of the schema itself are not used.
+
+        Returns a list of validated rows, or with `output='columns'` a
+        dictionary of validated columns, with None where a row does not
+        have the key. Raises NotValid with the errors of all rows, in row
+        order and prefixed with the index of the row. With `max_errors`,
+        validation stops once more than that many errors were found in the
+        whole table, so only the columns validated until then are reported.
+
+        """
+        from val._table import validate_table
+        return validate_table(self, table, output=output)
+
+    def _checked(self, data):
+        if self._checker is None:
+            self._checker = _parse_checker(self._definition)
+        return self._checker(data)
+
+    def _is_pure(self):
+        return not self.additional_validators and _is_pure(self._definition)
+
+    def _accepts(self, data_type):
+        return _may_accept(self._definition, data_type)
+
+
+def _validate_chunk(schema, chunk, on_error):
+    """Validate a chunk of items in a worker process."""
+    return schema.validate_many(chunk, on_error=on_error)
+
+
+def _iter_validated(item_validator, iterable, raise_errors):
+    """Generate validated items, or NotValid errors for invalid ones."""
+    for index, item in enumerate(iterable):
+        try:
+            yield item_validator(item)
+        except NotValid as ex:
+            error = NotValid(*[prefixed(index, e) for e in ex.errors])
+            if raise_errors:
+                raise error
+
+            yield error
+
 
 class Optional(object):
 
@@ -300,23 +1681,228 @@ class Optional(object):
 
 class Or(BaseSchema):
 
-    """Validates if any of the subschemas do."""
+    """Validates if any of the subschemas do.
+
+    Pass `adaptive=True` to count how often each alternative matches, and
+    try the alternatives that match most often first. This is only done
+    when no two alternatives can match the same data, because they accept
+    different types of data, or dictionaries with different values for the
+    same key, so that the outcome is always the same as trying them in
+    order. Only dictionaries, lists, tuples and sets are counted, other
+    data is already looked up by type and value. Alternatives are ordered
+    again after every thousand matches. Use `branch_info()` to see the
+    current order and counts.
+
+    """
+
+    _built = BaseSchema._built + (
+        'branches', 'schemas', 'checkers', '_literal_checkers', '_candidates',
+        '_tags', '_proof', '_ordered')
 
     def __init__(self, *values, **kwargs):
+        self.adaptive = kwargs.pop('adaptive', False)
         super(Or, self).__init__(**kwargs)
         self.values = values
-        self.schemas = tuple(parse_schema(s) for s in values)
+        self._order = tuple(range(len(values)))
+        self._hits = [0] * len(values)
+        self._matches = 0
+        self._build()
+
+    def _build(self):
+        self.branches = _build_branches(self.values, self.max_errors)
+        self.schemas = tuple(sub for _, sub in self.branches)
+        self.checkers = tuple(_parse_checker(s) for s in self.values)
+        self._literal_checkers = _fold_literals(
+            zip(self.values, self.checkers), lambda checker: checker)
+        self._candidates = _build_dispatch(self.values, self.branches)
+        self._tags = _find_tag(self.values)
+        self._proof = _build_proof(self.values) if self.adaptive else None
+        self._ordered = {}
+
+    def _tagged(self, data):
+        """Select alternatives by tag.
+
+        Return the positions of the alternatives that can match dictionary
+        data, and an error for when none do, or None if the value of the
+        tag can not be looked up.
+
+        """
+        key, index, others = self._tags
+        if key not in data:
+            return others, Error('missing key: %(expected)r', data, key)
+
+        tag = data[key]
+        if type(tag) not in TAG_TYPES:
+            return None
+
+        positions = index.get(tag)
+        if positions is None:
+            return others, Error(
+                '%(value)r is not one of %(expected)r', tag,
+                tuple(index), path=(key,))
+
+        return positions, None
 
     def _validated(self, data):
         """Validate data if any subschema validates it."""
-        errors = []
-        for sub in self.schemas:
+        if self._tags is not None and isinstance(data, dict):
+            selected = self._tagged(data)
+            if selected is not None:
+                return self._validated_tagged(data, *selected)
+
+        order = self._adaptive_order(data)
+        if order is not None:
+            return self._validated_adaptive(data, order)
+
+        errors = None
+        for probe, sub in self._candidates(data):
+            if probe is not None:
+                validated = probe(data)
+                if validated is not INVALID:
+                    return validated
+
+                continue
+
+            try:
+                return sub(data)
+            except NotValid as ex:
+                errors = errors or {}
+                errors[sub] = ex.errors
+
+        raise NotValid(Alternatives(self._errors(data, errors or {})))
+
+    def _validated_tagged(self, data, positions, error):
+        """Validate data with the alternatives at positions only."""
+        known = {}
+        for position in positions:
+            probe, sub = self.branches[position]
+            if probe is not None:
+                validated = probe(data)
+                if validated is not INVALID:
+                    return validated
+
+                continue
+
             try:
                 return sub(data)
             except NotValid as ex:
-                errors.extend(ex.args)
+                known[sub] = ex.errors
+
+        errors = [] if error is None else [error]
+        errors.extend(self._errors(
+            data, known, [self.schemas[position] for position in positions]))
+        raise NotValid(Alternatives(errors))
+
+    def _adaptive_order(self, data):
+        """Return the positions of the alternatives to try in order of hits.
+
+        Return None if the alternatives are not adaptive, or data is not of
+        a type for which they are proven not to overlap.
+
+        """
+        if self._proof is None:
+            return None
+
+        data_type = type(data)
+        if data_type not in ADAPTIVE_TYPES or data_type is dict and any(
+                type(data.get(key)) not in TAG_TYPES for key in self._proof):
+            return None
+
+        order = self._ordered.get(data_type)
+        if order is None:
+            order = self._ordered[data_type] = tuple(
+                position for position in self._order
+                if _may_accept(self.values[position], data_type))
+        return order
+
+    def _validated_adaptive(self, data, order):
+        """Validate data with the alternatives at positions, in order."""
+        known = {}
+        for position in order:
+            probe, sub = self.branches[position]
+            if probe is not None:
+                validated = probe(data)
+                if validated is INVALID:
+                    continue
+            else:
+                try:
+                    validated = sub(data)
+                except NotValid as ex:
+                    known[sub] = ex.errors
+                    continue
+
+            self._matched(position)
+            return validated
+
+        raise NotValid(Alternatives(self._errors(data, known)))
+
+    def _matched(self, position):
+        """Count a match, and order the alternatives again when it is time."""
+        self._hits[position] += 1
+        self._matches += 1
+        if self._matches % REORDER_EVERY == 0:
+            hits = self._hits
+            self._order = tuple(
+                sorted(self._order, key=lambda position: -hits[position]))
+            self._ordered = {}
+
+    def branch_info(self):
+        """Return the order in which alternatives are tried (as positions),
+        the number of matches of each alternative, and whether the order
+        adapts to them."""
+        return _info('BranchInfo', ['order', 'hits', 'adaptive'], (
+            self._order, tuple(self._hits), self._proof is not None))
+
+    def _errors(self, data, known, schemas=None):
+        """Collect the errors of all (or the given) subschemas, in order."""
+        errors = []
+        for sub in self.schemas if schemas is None else schemas:
+            if sub in known:
+                errors.extend(known[sub])
+                continue
 
-        raise NotValid(' and '.join(errors))
+            try:
+                sub(data)
+            except NotValid as ex:
+                errors.extend(ex.errors)
+        return errors
+
+    def _checked(self, data):
+        checkers = self.checkers
+        if self._tags is not None and isinstance(data, dict):
+            selected = self._tagged(data)
+            if selected is not None:
+                checkers = [checkers[position] for position in selected[0]]
+        elif type(data) in TAG_TYPES:
+            checkers = self._literal_checkers
+        elif self._proof is not None:
+            order = self._adaptive_order(data)
+            if order is not None:
+                return self._checked_adaptive(data, order)
+
+        for checker in checkers:
+            checked = checker(data)
+            if checked is not INVALID:
+                return checked
+
+        return INVALID
+
+    def _checked_adaptive(self, data, order):
+        """Check data with the alternatives at positions, in order."""
+        for position in order:
+            checked = self.checkers[position](data)
+            if checked is not INVALID:
+                self._matched(position)
+                return checked
+
+        return INVALID
+
+    def _is_pure(self):
+        return not self.additional_validators and all(
+            _is_pure(value) for value in self.values)
+
+    def _accepts(self, data_type):
+        return any(_may_accept(value, data_type) for value in self.values)
 
     def __repr__(self):
         return "<%s>" % (" or ".join(["%r" % (v,) for v in self.values]),)
@@ -331,10 +1917,17 @@ class And(BaseSchema):
 
     """Validates if all of the subschemas do."""
 
+    _built = BaseSchema._built + ('schemas', 'checkers')
+
     def __init__(self, *values, **kwargs):
         super(And, self).__init__(**kwargs)
         self.values = values
-        self.schemas = tuple(parse_schema(s) for s in values)
+        self._build()
+
+    def _build(self):
+        self.schemas = tuple(
+            parse_schema(s, self.max_errors) for s in self.values)
+        self.checkers = tuple(_parse_checker(s) for s in self.values)
 
     def _validated(self, data):
         """Validate data if all subschemas validate it."""
@@ -342,6 +1935,21 @@ class And(BaseSchema):
             data = sub(data)
         return data
 
+    def _checked(self, data):
+        for checker in self.checkers:
+            data = checker(data)
+            if data is INVALID:
+                return INVALID
+
+        return data
+
+    def _is_pure(self):
+        return not self.additional_validators and all(
+            _is_pure(value) for value in self.values)
+
+    def _accepts(self, data_type):
+        return not self.values or _may_accept(self.values[0], data_type)
+
     def __repr__(self):
         return "<%s>" % (" and ".join(["%r" % (v,) for v in self.values]),)
 
@@ -362,6 +1970,12 @@ class Convert(BaseSchema):
         except (TypeError, ValueError) as ex:
             raise NotValid(*ex.args)
 
+    def _checked(self, data):
+        try:
+            return self.convert(data)
+        except (TypeError, ValueError):
+            return INVALID
+
     def __repr__(self):
         return "<%s: %r>" % (self.__class__.__name__, self.convert)
 
@@ -370,21 +1984,53 @@ class Ordered(BaseSchema):
 
     """Validates an ordered iterable."""
 
+    _built = BaseSchema._built + ('validators',)
+
     def __init__(self, schemas, **kwargs):
         """Create schema from an ordered iterable."""
         super(Ordered, self).__init__(**kwargs)
         self._definition = schemas
-        self.schemas = type(schemas)(Schema(s) for s in schemas)
+        self.schemas = type(schemas)(
+            Schema(s, max_errors=self.max_errors) for s in schemas)
         self.length = len(self.schemas)
+        self._build()
+
+    def _build(self):
+        self.validators = tuple(
+            parse_schema(s, self.max_errors) for s in self._definition)
 
     def _validated(self, values):
         """Validate if the values are validated one by one in order."""
         if self.length != len(values):
             raise NotValid(
-                "%r does not have exactly %d values. (Got %d.)" % (
-                    values, self.length, len(values)))
+                Error(
+                    '%(value)r does not have exactly %(expected)d values. '
+                    '(Got %(length)d.)', values, self.length))
         return type(self.schemas)(
-            self.schemas[i].validate(v) for i, v in enumerate(values))
+            validator(value)
+            for validator, value in zip(self.validators, values))
+
+    def _checked(self, values):
+        if self.length != len(values):
+            return INVALID
+
+        checked = []
+        changed = type(values) is not type(self.schemas)
+        for schema, value in zip(self.schemas, values):
+            item = schema._check(value)
+            if item is INVALID:
+                return INVALID
+
+            changed = changed or item is not value
+            checked.append(item)
+        if not changed:
+            return values
+
+        return type(self.schemas)(checked)
+
+    def _is_pure(self):
+        return not self.additional_validators and all(
+            schema._is_pure() for schema in self.schemas)
 
     def __repr__(self):
         return "<%s: %r>" % (self.__class__.__name__, self.schemas)
@@ -3,8 +3,156 @@
 __all__ = ['NotValid']
 
 
+def _get_repr(thing):
+    """Get sensible string representation for validator."""
+    return (
+        getattr(thing, '__doc__') or
+        getattr(thing, '__name__') or
+        repr(thing))
+
+
+class Error(object):
+
+    """A single validation error, only rendered to a string when needed.
+
+    `template` is formatted with this object as its mapping, so it can refer
+    to `%(value)r`, `%(expected)r`, `%(description)s` (a readable name for
+    the expected validator) and `%(length)d` (the length of the value).
+    `path` holds the keys leading from the validated data to the value.
+
+    """
+
+    __slots__ = ('template', 'value', 'expected', 'path')
+
+    def __init__(self, template, value, expected=None, path=()):
+        self.template = template
+        self.value = value
+        self.expected = expected
+        self.path = path
+
+    def __getitem__(self, name):
+        if name == 'value':
+            return self.value
+
+        if name == 'expected':
+            return self.expected
+
+        if name == 'description':
+            return _get_repr(self.expected)
+
+        if name == 'length':
+            return len(self.value)
+
+        raise KeyError(name)
+
+    def message(self):
+        """Render the error without its path."""
+        return self.template % self
+
+    def prefixed(self, key):
+        """Return a copy of this error one level deeper in the data."""
+        return self.__class__(
+            self.template, self.value, self.expected, (key,) + self.path)
+
+    def __str__(self):
+        return ''.join(
+            ['%r: ' % (key,) for key in self.path] + [self.message()])
+
+    def __repr__(self):
+        return '<%s: %r>' % (self.__class__.__name__, str(self))
+
+
+class Alternatives(Error):
+
+    """The errors of every alternative, none of which matched."""
+
+    __slots__ = ()
+
+    def __init__(self, errors, path=()):
+        super(Alternatives, self).__init__(None, errors, path=path)
+
+    def message(self):
+        return ' and '.join(str(error) for error in self.value)
+
+    def prefixed(self, key):
+        return self.__class__(self.value, (key,) + self.path)
+
+
+class Truncated(Error):
+
+    """Marks where validation stopped because it found too many errors."""
+
+    __slots__ = ()
+
+    def __init__(self, max_errors):
+        super(Truncated, self).__init__(
+            'truncated: stopped after %(expected)d error' +
+            ('' if max_errors == 1 else 's'), None, max_errors)
+
+    def prefixed(self, key):
+        return self
+
+
+def truncated(errors, max_errors):
+    """Keep the first max_errors errors, and mark that there were more."""
+    return [
+        error for error in errors if not isinstance(error, Truncated)
+    ][:max_errors] + [Truncated(max_errors)]
+
+
+def prefixed(key, error):
+    """Prefix an error or a plain error message with a key."""
+    if isinstance(error, Error):
+        return error.prefixed(key)
+
+    return Error('%(value)s', error, path=(key,))
+
+
 class NotValid(Exception):
 
-    """Object not valid for schema."""
+    """Object not valid for schema.
+
+    The arguments can be plain messages or `Error` records. Records are only
+    rendered to strings when `args` is read, or the exception is printed, so
+    errors that are caught and discarded are cheap. The unrendered arguments
+    are available as `errors`.
+
+    """
+
+    def __init__(self, *errors):
+        super(NotValid, self).__init__(*errors)
+        self.errors = errors
+        self._args = None
+
+    @property
+    def args(self):
+        """The error messages, rendered on first access."""
+        if self._args is None:
+            self._args = tuple(
+                str(error) if isinstance(error, Error) else error
+                for error in self.errors)
+        return self._args
+
+    @args.setter
+    def args(self, value):
+        self.errors = self._args = tuple(value)
+
+    def __str__(self):
+        args = self.args
+        if not args:
+            return ''
+
+        if len(args) == 1:
+            return str(args[0])
+
+        return str(args)
+
+    def __repr__(self):
+        args = self.args
+        if len(args) == 1:
+            return '%s(%r)' % (self.__class__.__name__, args[0])
+
+        return '%s%r' % (self.__class__.__name__, args)
 
-    pass
+    def __reduce__(self):
+        return (self.__class__, self.args)
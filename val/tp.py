@@ -1,10 +1,8 @@
 """Convert teleport schemas into val schemas and vice versa."""
 
-import json
 from decimal import Decimal
 from val import BaseSchema, Optional, Or, Schema
-from sys import version_info
-from pyrfc3339 import parse as rfc3339
+from sys import modules, version_info
 
 
 PYTHON_VERSION = version_info[0]
@@ -13,8 +11,23 @@ STRING = str if PYTHON_VERSION == 3 else Or(str, unicode)  # noqa
 TeleportDecimal = Or(float, Decimal, int)
 
 
+def rfc3339(value):
+    """Parse an RFC 3339 timestamp."""
+    # pyrfc3339 (and json below) are slow to import, so put off importing
+    # them until they are used.
+    from pyrfc3339 import parse
+    return parse(value)
+
+
+def _is_rfc3339(definition):
+    """Detect pyrfc3339's own parse function, if it has been imported."""
+    module = modules.get('pyrfc3339')
+    return module is not None and definition is getattr(module, 'parse', None)
+
+
 def is_jsonable(value):
     """Detect if the value can be converted to JSON."""
+    import json
     try:
         json.dumps(value)
     except TypeError:
@@ -163,11 +176,15 @@ def from_val(val_schema):
     if definition in VAL_PRIMITIVES:
         return VAL_PRIMITIVES[definition]
 
+    if _is_rfc3339(definition):
+        return VAL_PRIMITIVES[rfc3339]
+
     raise SerializationError(
         "Serializing %r not (yet) supported." % definition)
 
 
 def document(schema):
     """Print a documented teleport version of the schema."""
+    import json
     teleport_schema = from_val(schema)
     return json.dumps(teleport_schema, sort_keys=True, indent=2)